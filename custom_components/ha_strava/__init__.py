@@ -3,19 +3,24 @@
 import asyncio
 import logging
 import json
+import time
+from hashlib import md5
 from json import JSONDecodeError
 from typing import Callable
 import voluptuous as vol
-from aiohttp import ClientSession
+from aiohttp import ClientSession, ClientError
 from aiohttp.web import json_response, Response, Request
 from datetime import datetime as dt
 
 # HASS imports
 from homeassistant import data_entry_flow
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.components.http.view import HomeAssistantView
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
 from homeassistant.helpers.network import get_url, NoURLAvailableError
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.event import async_track_time_change
+from homeassistant.util import dt as dt_util
 from homeassistant.config_entries import ConfigEntry, SOURCE_IMPORT
 from homeassistant.const import (
     CONF_CLIENT_ID,
@@ -24,7 +29,7 @@ from homeassistant.const import (
     CONF_WEBHOOK_ID,
     EVENT_COMPONENT_LOADED,
     EVENT_CORE_CONFIG_UPDATE,
-    EVENT_HOMEASSISTANT_START,
+    EVENT_HOMEASSISTANT_STARTED,
     EVENT_TIME_CHANGED,
 )
 from homeassistant.helpers import (
@@ -35,26 +40,32 @@ from homeassistant.helpers import (
 
 # custom module imports
 from .config_flow import OAuth2FlowHandler
+from .geocode import GeocodeCache
+from .activities import transform_activity
+from .history import ActivityHistory, start_timestamp
+from .scheduler import RefreshScheduler
+from .api import StravaApiClient
+from .coordinator import StravaDataCoordinator
+from .webhook import WebhookEventQueue, parse_webhook_event
+from .polling import AdaptivePoller
+from .snapshot import DataSnapshot
 from .const import (
     DOMAIN,
     OAUTH2_AUTHORIZE,
     OAUTH2_TOKEN,
     CONFIG_IMG_SIZE,
+    PHOTO_FETCH_MAX_CONCURRENCY,
+    STORAGE_VERSION,
+    STORAGE_KEY_PHOTO_STATE,
+    STORAGE_SAVE_DELAY_SECONDS,
     CONF_IMG_UPDATE_EVENT,
     CONF_IMG_ROTATE_EVENT,
     WEBHOOK_SUBSCRIPTION_URL,
     CONF_CALLBACK_URL,
     AUTH_CALLBACK_PATH,
-    CONF_SENSOR_DATE,
+    CONF_SENSOR_ID,
     CONF_SENSOR_ACTIVITY_COUNT,
-    CONF_SENSOR_DURATION,
-    CONF_SENSOR_PACE,
     CONF_SENSOR_DISTANCE,
-    CONF_SENSOR_KUDOS,
-    CONF_SENSOR_CALORIES,
-    CONF_SENSOR_ELEVATION,
-    CONF_SENSOR_POWER,
-    CONF_SENSOR_TROPHIES,
     CONF_SENSOR_TITLE,
     CONF_SENSOR_CITY,
     CONF_SENSOR_MOVING_TIME,
@@ -64,11 +75,26 @@ from .const import (
     CONF_ACTIVITY_TYPE_SWIM,
     CONF_SUMMARY_YTD,
     CONF_SUMMARY_ALL,
-    CONF_STRAVA_DATA_UPDATE_EVENT,
     CONF_STRAVA_CONFIG_UPDATE_EVENT,
     CONF_STRAVA_RELOAD_EVENT,
-    FACTOR_KILOJOULES_TO_KILOCALORIES,
     MAX_NB_ACTIVITIES,
+    CONF_ACTIVITY_WINDOW,
+    DEFAULT_ACTIVITY_WINDOW,
+    MAX_ACTIVITY_WINDOW,
+    ACTIVITIES_PAGE_SIZE,
+    HISTORY_BACKFILL_SHORT_TERM_RESERVE,
+    HISTORY_BACKFILL_DAILY_RESERVE,
+    WEBHOOK_OBJECT_TYPE_ATHLETE,
+    WEBHOOK_ASPECT_TYPE_UPDATE,
+    WEBHOOK_ASPECT_TYPE_DELETE,
+    WEBHOOK_UPDATE_TITLE,
+    WEBHOOK_UPDATE_TYPE,
+    WEBHOOK_UPDATE_PRIVATE,
+    WEBHOOK_UPDATE_AUTHORIZED,
+    GEOCODE_URL,
+    GEOCODE_MAX_CONCURRENCY,
+    GEOCODE_TIMEOUT_SECONDS,
+    DEFAULT_CITY,
 )
 
 _LOGGER = logging.getLogger(__name__)
@@ -87,274 +113,674 @@ class StravaWebhookView(HomeAssistantView):
     name = "api:strava:webhook"
     requires_auth = False
     cors_allowed = True
-    image_updates = {}
 
     def __init__(
         self,
         oauth_websession: config_entry_oauth2_flow.OAuth2Session,
         event_factory: Callable,
-        host: str,
+        coordinator: StravaDataCoordinator,
         hass: HomeAssistant,
+        geocode_cache: GeocodeCache,
+        history: ActivityHistory,
+        snapshot: DataSnapshot,
+        activity_window: int = DEFAULT_ACTIVITY_WINDOW,
     ):
         """Init the view."""
         self.oauth_websession = oauth_websession
+        self.strava_api = StravaApiClient(oauth_websession)
         self.event_factory = event_factory
+        self.coordinator = coordinator
+        self.geocode_cache = geocode_cache
+        self.history = history
+        self.snapshot = snapshot
+        self.activity_window = activity_window
+        self._backfill_task = None
+        self._pending_geocodes = {}  # geocode cache key -> lookup task
+        self.athlete_id = None
+        self.summary_stats_fetched = False
+        self.image_updates = {}  # activity id -> datetime of the last photo update
+        self.image_fingerprints = {}  # activity id -> {"etag": ..., "hash": ...}
+        self._photo_store = Store(hass, STORAGE_VERSION, STORAGE_KEY_PHOTO_STATE)
+        self.refresh_scheduler = RefreshScheduler(
+            hass=hass,
+            full_refresh=self.fetch_strava_data,
+            sync_activity=self.sync_activity,
+        )
+        self.poller = AdaptivePoller(
+            hass=hass,
+            history=history,
+            strava_api=self.strava_api,
+            request_refresh=self.refresh_scheduler.async_request_refresh,
+        )
+        self.webhook_events = WebhookEventQueue(
+            hass=hass, handle_event=self.async_handle_webhook_event
+        )
         self.webhook_id = None
-        self.host = host
+        self.owner_id = None
+        self.deauthorized = False
         self.hass = hass
 
-    async def fetch_strava_data(self):
+    async def _geocode_activity(self, activity: dict, semaphore: asyncio.Semaphore):
         """
-        Fetches data for the latest activities from the Strava API
-        Fetches location data for these activities from https://geocode.xyz
-        Fires a Strava Update Event for Sensors to listen to
+        Fetches the city name for the start location of a single activity from https://geocode.xyz
+        Cities are served from the geocode cache if available
+        Concurrent lookups of the same (rounded) coordinates share a single request
         """
+        latitude = activity.get("start_latitude", 0)
+        longitude = activity.get("start_longitude", 0)
+
+        city = self.geocode_cache.get(latitude, longitude)
+        if city:
+            return city
+
+        key = self.geocode_cache.key(latitude, longitude)
+        lookup = self._pending_geocodes.get(key)
+        if lookup is None:
+            lookup = self.hass.async_create_task(
+                self._lookup_city(latitude, longitude, activity.get("id"), semaphore)
+            )
+            self._pending_geocodes[key] = lookup
+            lookup.add_done_callback(lambda _: self._pending_geocodes.pop(key, None))
 
-        _LOGGER.debug("Fetching Data from Strava API")
+        # a cancelled caller must not cancel the lookup of the other callers
+        return await asyncio.shield(lookup)
 
-        activities_response = await self.oauth_websession.async_request(
-            method="GET",
-            url=f"https://www.strava.com/api/v3/athlete/activities?per_page={MAX_NB_ACTIVITIES}",
-        )
+    async def _lookup_city(
+        self, latitude, longitude, activity_id, semaphore: asyncio.Semaphore
+    ):
+        """
+        Requests the city name for a pair of coordinates and stores it in the geocode cache
+        Falls back to the default city if the lookup fails or times out
+        """
 
-        summary_stats_obj = None
+        async def request_city():
+            websession = async_get_clientsession(self.hass)
+            geo_location_response = await websession.get(
+                url=f"{GEOCODE_URL}/{latitude},{longitude}?geoit=json"
+            )
+            geo_location = json.loads(await geo_location_response.text())
+            return geo_location.get("city", None) or geo_location.get("name", None)
 
-        if activities_response.status == 200:
-            activities = json.loads(await activities_response.text())
-            cities = []
-            new_activity_ids = []
-            athlete_id = None
-            for activity in activities:
-                new_activity_ids.append(activity.get("id"))
-                athlete_id = int(activity["athlete"]["id"])
-                geo_location_response = await self.oauth_websession.async_request(
-                    method="GET",
-                    url=f'https://geocode.xyz/{activity.get("start_latitude", 0)},{activity.get("start_longitude", 0)}?geoit=json',
+        async with semaphore:
+            try:
+                city = await asyncio.wait_for(
+                    request_city(), timeout=GEOCODE_TIMEOUT_SECONDS
                 )
-                geo_location = json.loads(await geo_location_response.text())
-                city = geo_location.get("city", None)
-                if city:
-                    cities.append(city)
-                else:
-                    cities.append(geo_location.get("name", "Paradise City"))
-
-            activities = sorted(
-                [
-                    {
-                        CONF_SENSOR_TITLE: activity.get("name", "Strava Activity"),
-                        CONF_SENSOR_CITY: cities[idx],
-                        CONF_SENSOR_ACTIVITY_TYPE: activity.get("type", "Ride").lower(),
-                        CONF_SENSOR_DISTANCE: float(activity.get("distance", -1)),
-                        CONF_SENSOR_DATE: dt.strptime(
-                            activity.get("start_date_local", "2000-01-01T00:00:00Z"),
-                            "%Y-%m-%dT%H:%M:%SZ",
-                        ),
-                        CONF_SENSOR_DURATION: float(activity.get("elapsed_time", -1)),
-                        CONF_SENSOR_MOVING_TIME: float(activity.get("moving_time", -1)),
-                        CONF_SENSOR_KUDOS: int(activity.get("kudos_count", -1)),
-                        CONF_SENSOR_CALORIES: int(
-                            activity.get(
-                                "kilojoules", -1 / FACTOR_KILOJOULES_TO_KILOCALORIES
-                            )
-                            * FACTOR_KILOJOULES_TO_KILOCALORIES
-                        ),
-                        CONF_SENSOR_ELEVATION: int(
-                            activity.get("total_elevation_gain", -1)
-                        ),
-                        CONF_SENSOR_POWER: float(activity.get("average_watts", -1)),
-                        CONF_SENSOR_TROPHIES: int(
-                            activity.get("achievement_count", -1)
-                        ),
+            except (asyncio.TimeoutError, ClientError, ValueError, AttributeError) as err:
+                _LOGGER.warning(
+                    f"Could not fetch location for activity {activity_id}: {err!r}"
+                )
+                return DEFAULT_CITY
+
+        if not city:
+            return DEFAULT_CITY
+
+        self.geocode_cache.set(latitude, longitude, city)
+        return city
+
+    async def geocode_activities(self, activities: list):
+        """
+        Fetches city names for a list of activities concurrently
+        At most GEOCODE_MAX_CONCURRENCY requests are in flight at any time
+        Returns the cities in the same order as the activities
+        """
+        semaphore = asyncio.Semaphore(GEOCODE_MAX_CONCURRENCY)
+        return await asyncio.gather(
+            *[self._geocode_activity(activity, semaphore) for activity in activities]
+        )
+
+    async def async_load_photo_state(self):
+        """load the photo update timestamps and fingerprints from disk"""
+        data = await self._photo_store.async_load()
+        if not data:
+            return
+        for activity_id, photo_state in data.get("activities", {}).items():
+            self.image_updates[int(activity_id)] = dt.fromisoformat(
+                photo_state["updated"]
+            )
+            self.image_fingerprints[int(activity_id)] = {
+                "etag": photo_state.get("etag"),
+                "hash": photo_state.get("hash"),
+            }
+
+    def _save_photo_state(self):
+        """schedule a (delayed) write of the photo state to disk"""
+
+        def data_to_save():
+            return {
+                "activities": {
+                    str(activity_id): {
+                        "updated": updated.isoformat(),
+                        **self.image_fingerprints.get(activity_id, {}),
                     }
-                    for idx, activity in enumerate(activities)
-                ],
-                key=lambda activity: activity[CONF_SENSOR_DATE],
-                reverse=True,
+                    for activity_id, updated in self.image_updates.items()
+                }
+            }
+
+        self._photo_store.async_delay_save(data_to_save, STORAGE_SAVE_DELAY_SECONDS)
+
+    async def _fetch_activity_image_urls(
+        self, activity_id: int, semaphore: asyncio.Semaphore
+    ):
+        """
+        Fetches the image urls of a single activity from the Strava API
+        Makes a conditional request if Strava returned an ETag for the activity's photos before
+        Returns an empty list if the photos of the activity did not change
+        Returns None if the image urls could not be fetched
+        """
+        img_request_url = f"https://www.strava.com/api/v3/activities/{activity_id}/photos?size={CONFIG_IMG_SIZE}"
+        fingerprint = self.image_fingerprints.get(activity_id, {})
+
+        headers = {}
+        if fingerprint.get("etag"):
+            headers["If-None-Match"] = fingerprint["etag"]
+
+        async with semaphore:
+            img_response = await self.strava_api.async_request(
+                method="GET", url=img_request_url, headers=headers,
             )
+            img_response_text = await img_response.text()
+
+        if img_response.status == 304:
+            self.image_updates[activity_id] = dt.now()
+            return []
 
-            newly_added_activity_ids = [
-                id for id in new_activity_ids if id not in self.image_updates.keys()
+        if img_response.status == 429:
+            _LOGGER.warning("Strava API rate limit has been reached")
+            return None
+
+        if img_response.status != 200:
+            _LOGGER.error(
+                f"Could not fetch strava image urls from {img_request_url} (response code: {img_response.status}): {img_response_text}"
+            )
+            return None
+
+        self.image_updates[activity_id] = dt.now()
+        new_fingerprint = {
+            "etag": img_response.headers.get("ETag"),
+            "hash": md5(img_response_text.encode()).hexdigest(),
+        }
+        self.image_fingerprints[activity_id] = new_fingerprint
+
+        if new_fingerprint["hash"] == fingerprint.get("hash"):
+            _LOGGER.debug(f"Photos of Strava activity {activity_id} did not change")
+            return []
+
+        img_urls = []
+        for image in json.loads(img_response_text):
+            img_date = dt.strptime(
+                image.get("created_at_local", "2000-01-01T00:00:00Z"),
+                "%Y-%m-%dT%H:%M:%SZ",
+            )
+            img_url = list(image.get("urls").values())[0]
+            img_urls.append({"date": img_date, "url": img_url})
+        return img_urls
+
+    async def _fetch_image_urls(self, activity_ids: list):
+        """
+        Fetches the image urls for a list of activities from the Strava API
+        Photo lists are fetched concurrently, at most PHOTO_FETCH_MAX_CONCURRENCY at a time
+        Images are only updated once a day per activity
+        Activities whose photos could not be fetched are retried with the next refresh
+        """
+        semaphore = asyncio.Semaphore(PHOTO_FETCH_MAX_CONCURRENCY)
+        results = await asyncio.gather(
+            *[
+                self._fetch_activity_image_urls(activity_id, semaphore)
+                for activity_id in activity_ids
+                if (dt.now() - self.image_updates.get(activity_id, dt(1990, 1, 1))).days
+                > 0
             ]
-            img_urls = []
-            self.image_updates = {
-                id: self.image_updates.get(id, dt(1990, 1, 1))
-                for id in new_activity_ids
-            }
-            # only update images once a day per activity
-            for activity_id in [
-                id
-                for id in self.image_updates.keys()
-                if (dt.now() - self.image_updates[id]).days > 0
-            ]:
-                img_request_url = f"https://www.strava.com/api/v3/activities/{activity_id}/photos?size={CONFIG_IMG_SIZE}"
-
-                img_response = await self.oauth_websession.async_request(
-                    method="GET", url=img_request_url,
-                )
+        )
+
+        img_urls = []
+        for activity_img_urls in results:
+            if activity_img_urls:
+                img_urls.extend(activity_img_urls)
 
-                if img_response.status == 200:
-                    images = json.loads(await img_response.text())
-                    for image in images:
-                        img_date = dt.strptime(
-                            image.get("created_at_local", "2000-01-01T00:00:00Z"),
-                            "%Y-%m-%dT%H:%M:%SZ",
+        self._save_photo_state()
+        return img_urls
+
+    async def _fetch_summary_stats(self, athlete_id: int):
+        """
+        Fetches the ytd and all-time summary stats of the athlete from the Strava API
+        Returns None if the summary stats could not be fetched
+        """
+        summary_stats_url = f"https://www.strava.com/api/v3/athletes/{athlete_id}/stats"
+
+        summary_stats_response = await self.strava_api.async_request(
+            method="GET", url=summary_stats_url,
+        )
+
+        if summary_stats_response.status != 200:
+            _LOGGER.error(
+                f"Could not fetch strava summary stats (response code: {summary_stats_response.status}): {await summary_stats_response.text()}"
+            )
+            return None
+
+        sumary_stats = json.loads(await summary_stats_response.text())
+        self.summary_stats_fetched = True
+        return {
+            CONF_ACTIVITY_TYPE_RIDE: {
+                CONF_SUMMARY_YTD: {
+                    CONF_SENSOR_DISTANCE: float(
+                        sumary_stats.get(
+                            "ytd_ride_totals", {"distance": 0}
+                        ).get("distance", 0)
+                    ),
+                    CONF_SENSOR_ACTIVITY_COUNT: int(
+                        sumary_stats.get("ytd_ride_totals", {"count": 0}).get(
+                            "count", 0
+                        )
+                    ),
+                    CONF_SENSOR_MOVING_TIME: float(
+                        sumary_stats.get(
+                            "ytd_ride_totals", {"moving_time": 0}
+                        ).get("moving_time", 0)
+                    ),
+                },
+                CONF_SUMMARY_ALL: {
+                    CONF_SENSOR_DISTANCE: float(
+                        sumary_stats.get(
+                            "all_ride_totals", {"distance": 0}
+                        ).get("distance", 0)
+                    ),
+                    CONF_SENSOR_ACTIVITY_COUNT: int(
+                        sumary_stats.get("all_ride_totals", {"count": 0}).get(
+                            "count", 0
+                        )
+                    ),
+                    CONF_SENSOR_MOVING_TIME: float(
+                        sumary_stats.get(
+                            "all_ride_totals", {"moving_time": 0}
+                        ).get("moving_time", 0)
+                    ),
+                },
+            },
+            CONF_ACTIVITY_TYPE_RUN: {
+                CONF_SUMMARY_YTD: {
+                    CONF_SENSOR_DISTANCE: float(
+                        sumary_stats.get("ytd_run_totals", {"distance": 0}).get(
+                            "distance", 0
+                        )
+                    ),
+                    CONF_SENSOR_ACTIVITY_COUNT: int(
+                        sumary_stats.get("ytd_run_totals", {"count": 0}).get(
+                            "count", 0
+                        )
+                    ),
+                    CONF_SENSOR_MOVING_TIME: float(
+                        sumary_stats.get(
+                            "ytd_run_totals", {"moving_time": 0}
+                        ).get("moving_time", 0)
+                    ),
+                },
+                CONF_SUMMARY_ALL: {
+                    CONF_SENSOR_DISTANCE: float(
+                        sumary_stats.get("all_run_totals", {"distance": 0}).get(
+                            "distance", 0
+                        )
+                    ),
+                    CONF_SENSOR_ACTIVITY_COUNT: int(
+                        sumary_stats.get("all_run_totals", {"count": 0}).get(
+                            "count", 0
                         )
-                        img_url = list(image.get("urls").values())[0]
-                        img_urls.append({"date": img_date, "url": img_url})
-                    self.image_updates[activity_id] = dt.now()
+                    ),
+                    CONF_SENSOR_MOVING_TIME: float(
+                        sumary_stats.get(
+                            "all_run_totals", {"moving_time": 0}
+                        ).get("moving_time", 0)
+                    ),
+                },
+            },
+            CONF_ACTIVITY_TYPE_SWIM: {
+                CONF_SUMMARY_YTD: {
+                    CONF_SENSOR_DISTANCE: float(
+                        sumary_stats.get(
+                            "ytd_swim_totals", {"distance": 0}
+                        ).get("distance", 0)
+                    ),
+                    CONF_SENSOR_ACTIVITY_COUNT: int(
+                        sumary_stats.get("ytd_swim_totals", {"count": 0}).get(
+                            "count", 0
+                        )
+                    ),
+                    CONF_SENSOR_MOVING_TIME: float(
+                        sumary_stats.get(
+                            "ytd_swim_totals", {"moving_time": 0}
+                        ).get("moving_time", 0)
+                    ),
+                },
+                CONF_SUMMARY_ALL: {
+                    CONF_SENSOR_DISTANCE: float(
+                        sumary_stats.get(
+                            "all_swim_totals", {"distance": 0}
+                        ).get("distance", 0)
+                    ),
+                    CONF_SENSOR_ACTIVITY_COUNT: int(
+                        sumary_stats.get("all_swim_totals", {"count": 0}).get(
+                            "count", 0
+                        )
+                    ),
+                    CONF_SENSOR_MOVING_TIME: float(
+                        sumary_stats.get(
+                            "all_swim_totals", {"moving_time": 0}
+                        ).get("moving_time", 0)
+                    ),
+                },
+            },
+        }
 
-                elif activities_response.status == 429:
-                    _LOGGER.warn(f"Strava API rate limit has been reached")
-                    return
+    def _fire_update_events(self, summary_stats_obj, img_urls: list):
+        """
+        Pushes the activity window and the aggregates of the local history to the sensors via the coordinator
+        Sensor updates are skipped entirely if the activities and summary stats did not change since the last snapshot
+        Fires an Image Update Event for new image urls
+        """
+        activities = self.history.activities.latest(self.activity_window)
+        if self.snapshot.update(
+            activities, summary_stats_obj or self.coordinator.summary_stats
+        ):
+            self.coordinator.async_set_data(
+                activities=activities, summary_stats=summary_stats_obj,
+            )
+        else:
+            _LOGGER.debug(
+                f"Strava data did not change (version: {self.snapshot.version}): skipping sensor updates"
+            )
+        self.publish_aggregates()
+        if len(img_urls) > 0:
+            self.event_factory(
+                data={"img_urls": img_urls}, event_type=CONF_IMG_UPDATE_EVENT
+            )
 
+    @callback
+    def publish_aggregates(self):
+        """pushes the aggregates over recent time windows to the sensors via the coordinator"""
+        self.coordinator.async_set_aggregates(
+            self.history.aggregates.snapshot(dt_util.now().replace(tzinfo=None)),
+            activity_types=self.history.activity_types(),
+        )
+
+    async def _fetch_activity_page(
+        self, per_page: int, before: int = None, after: int = None
+    ):
+        """
+        Fetches a single page of activities from /athlete/activities
+        Only activities which started before the `before` cursor / after the `after` cursor (epoch seconds) are returned
+        Returns None if the page could not be fetched
+        """
+        params = {"per_page": per_page}
+        if before is not None:
+            params["before"] = before
+        if after is not None:
+            params["after"] = after
+
+        activities_response = await self.strava_api.async_request(
+            method="GET",
+            url="https://www.strava.com/api/v3/athlete/activities",
+            params=params,
+        )
+
+        if activities_response.status == 429:
+            _LOGGER.warning("Strava API rate limit has been reached")
+            return None
+
+        if activities_response.status != 200:
+            _LOGGER.error(
+                f"Could not fetch strava activities (response code: {activities_response.status}): {await activities_response.text()}"
+            )
+            return None
+
+        return json.loads(await activities_response.text())
+
+    async def _transform_activity_page(self, raw_activities: list, geocode: bool):
+        """
+        Transforms a page of raw activities into activities and their UTC start times
+        Activities are only geocoded if `geocode` is set, i.e. for the activities shown by the activity sensors;
+        otherwise, they keep their known city or use the geocode cache
+        """
+        if len(raw_activities) > 0 and self.athlete_id is None:
+            self.athlete_id = int(raw_activities[0]["athlete"]["id"])
+
+        if geocode:
+            cities = await self.geocode_activities(raw_activities)
+        else:
+            cities = []
+            for activity in raw_activities:
+                known_activity = self.history.get(activity.get("id"))
+                if known_activity is not None:
+                    cities.append(known_activity[CONF_SENSOR_CITY])
                 else:
-                    _LOGGER.error(
-                        f"Could not fetch strava image urls from {img_request_url} (response code: {img_response.status}): {await img_response.text()}"
+                    cities.append(
+                        self.geocode_cache.get(
+                            activity.get("start_latitude", 0),
+                            activity.get("start_longitude", 0),
+                        )
+                        or DEFAULT_CITY
                     )
-                    return
 
-            if len(newly_added_activity_ids) > 0:
-                # fetch summary stats
-                summary_stats_url = (
-                    f"https://www.strava.com/api/v3/athletes/{athlete_id}/stats"
-                )
+        activities = [
+            transform_activity(activity, cities[idx])
+            for idx, activity in enumerate(raw_activities)
+        ]
+        start_timestamps = [start_timestamp(activity) for activity in raw_activities]
+        return activities, start_timestamps
 
-                summary_stats_response = await self.oauth_websession.async_request(
-                    method="GET", url=summary_stats_url,
-                )
+    async def _top_up_history(self, known_after: int) -> bool:
+        """
+        Fetches all activities after the newest activity in the local history, oldest first
+        Returns False if a page could not be fetched
+        """
+        after = known_after
+        while True:
+            raw_activities = await self._fetch_activity_page(
+                per_page=ACTIVITIES_PAGE_SIZE, after=after
+            )
+            if raw_activities is None:
+                return False
 
-                sumary_stats = json.loads(await summary_stats_response.text())
-                summary_stats_obj = {
-                    CONF_ACTIVITY_TYPE_RIDE: {
-                        CONF_SUMMARY_YTD: {
-                            CONF_SENSOR_DISTANCE: float(
-                                sumary_stats.get(
-                                    "ytd_ride_totals", {"distance": 0}
-                                ).get("distance", 0)
-                            ),
-                            CONF_SENSOR_ACTIVITY_COUNT: int(
-                                sumary_stats.get("ytd_ride_totals", {"count": 0}).get(
-                                    "count", 0
-                                )
-                            ),
-                            CONF_SENSOR_MOVING_TIME: float(
-                                sumary_stats.get(
-                                    "ytd_ride_totals", {"moving_time": 0}
-                                ).get("moving_time", 0)
-                            ),
-                        },
-                        CONF_SUMMARY_ALL: {
-                            CONF_SENSOR_DISTANCE: float(
-                                sumary_stats.get(
-                                    "all_ride_totals", {"distance": 0}
-                                ).get("distance", 0)
-                            ),
-                            CONF_SENSOR_ACTIVITY_COUNT: int(
-                                sumary_stats.get("all_ride_totals", {"count": 0}).get(
-                                    "count", 0
-                                )
-                            ),
-                            CONF_SENSOR_MOVING_TIME: float(
-                                sumary_stats.get(
-                                    "all_ride_totals", {"moving_time": 0}
-                                ).get("moving_time", 0)
-                            ),
-                        },
-                    },
-                    CONF_ACTIVITY_TYPE_RUN: {
-                        CONF_SUMMARY_YTD: {
-                            CONF_SENSOR_DISTANCE: float(
-                                sumary_stats.get("ytd_run_totals", {"distance": 0}).get(
-                                    "distance", 0
-                                )
-                            ),
-                            CONF_SENSOR_ACTIVITY_COUNT: int(
-                                sumary_stats.get("ytd_run_totals", {"count": 0}).get(
-                                    "count", 0
-                                )
-                            ),
-                            CONF_SENSOR_MOVING_TIME: float(
-                                sumary_stats.get(
-                                    "ytd_run_totals", {"moving_time": 0}
-                                ).get("moving_time", 0)
-                            ),
-                        },
-                        CONF_SUMMARY_ALL: {
-                            CONF_SENSOR_DISTANCE: float(
-                                sumary_stats.get("all_run_totals", {"distance": 0}).get(
-                                    "distance", 0
-                                )
-                            ),
-                            CONF_SENSOR_ACTIVITY_COUNT: int(
-                                sumary_stats.get("all_run_totals", {"count": 0}).get(
-                                    "count", 0
-                                )
-                            ),
-                            CONF_SENSOR_MOVING_TIME: float(
-                                sumary_stats.get(
-                                    "all_run_totals", {"moving_time": 0}
-                                ).get("moving_time", 0)
-                            ),
-                        },
-                    },
-                    CONF_ACTIVITY_TYPE_SWIM: {
-                        CONF_SUMMARY_YTD: {
-                            CONF_SENSOR_DISTANCE: float(
-                                sumary_stats.get(
-                                    "ytd_swim_totals", {"distance": 0}
-                                ).get("distance", 0)
-                            ),
-                            CONF_SENSOR_ACTIVITY_COUNT: int(
-                                sumary_stats.get("ytd_swim_totals", {"count": 0}).get(
-                                    "count", 0
-                                )
-                            ),
-                            CONF_SENSOR_MOVING_TIME: float(
-                                sumary_stats.get(
-                                    "ytd_swim_totals", {"moving_time": 0}
-                                ).get("moving_time", 0)
-                            ),
-                        },
-                        CONF_SUMMARY_ALL: {
-                            CONF_SENSOR_DISTANCE: float(
-                                sumary_stats.get(
-                                    "all_swim_totals", {"distance": 0}
-                                ).get("distance", 0)
-                            ),
-                            CONF_SENSOR_ACTIVITY_COUNT: int(
-                                sumary_stats.get("all_swim_totals", {"count": 0}).get(
-                                    "count", 0
-                                )
-                            ),
-                            CONF_SENSOR_MOVING_TIME: float(
-                                sumary_stats.get(
-                                    "all_swim_totals", {"moving_time": 0}
-                                ).get("moving_time", 0)
-                            ),
-                        },
-                    },
-                }
+            activities, start_timestamps = await self._transform_activity_page(
+                raw_activities, geocode=False
+            )
+            self.history.add_page(activities, start_timestamps)
+
+            if len(raw_activities) < ACTIVITIES_PAGE_SIZE:
+                return True
+            after = max(start_timestamps)
+
+    async def fetch_strava_data(self):
+        """
+        Refreshes the most recent activities from the Strava API and tops up the local history
+        A single page with the activities shown by the activity sensors is fetched (so that e.g. kudos stay up to date);
+        only if all of them are new, the gap to the newest activity in the local history is filled with an `after` cursor
+        Fetches location data for these activities from https://geocode.xyz
+        Fires a Strava Update Event for Sensors to listen to
+        """
 
-        elif activities_response.status == 429:
-            _LOGGER.warn(f"Strava API rate limit has been reached")
+        if self.deauthorized:
             return
 
-        else:
-            _LOGGER.error(
-                f"Could not fetch strava activities (response code: {activities_response.status}): {await activities_response.text()}"
+        _LOGGER.debug("Fetching Data from Strava API")
+        fetch_started = time.monotonic()
+
+        known_after = self.history.top_up_after
+
+        raw_activities = await self._fetch_activity_page(per_page=MAX_NB_ACTIVITIES)
+        if raw_activities is None:
+            return
+
+        activities, start_timestamps = await self._transform_activity_page(
+            raw_activities, geocode=True
+        )
+
+        if (
+            known_after is not None
+            and len(raw_activities) == MAX_NB_ACTIVITIES
+            and min(start_timestamps) > known_after
+        ):
+            _LOGGER.debug("Topping up the local Strava activity history")
+            if not await self._top_up_history(known_after):
+                return
+
+        self.history.add_page(activities, start_timestamps)
+        # deleted or privatised activities are missing from the page; a short page holds all activities
+        self.history.reconcile_latest(
+            activities, complete=len(raw_activities) < MAX_NB_ACTIVITIES
+        )
+
+        new_activity_ids = [
+            activity[CONF_SENSOR_ID]
+            for activity in self.history.activities.latest(MAX_NB_ACTIVITIES)
+        ]
+        newly_added_activity_ids = [
+            id for id in new_activity_ids if id not in self.image_updates.keys()
+        ]
+        self.image_updates = {
+            id: self.image_updates.get(id, dt(1990, 1, 1)) for id in new_activity_ids
+        }
+        self.image_fingerprints = {
+            id: self.image_fingerprints[id]
+            for id in new_activity_ids
+            if id in self.image_fingerprints
+        }
+
+        img_urls = await self._fetch_image_urls(new_activity_ids)
+
+        summary_stats_obj = None
+        if len(newly_added_activity_ids) > 0 or not self.summary_stats_fetched:
+            summary_stats_obj = await self._fetch_summary_stats(self.athlete_id)
+
+        self._fire_update_events(summary_stats_obj, img_urls)
+        self.async_start_backfill()
+        _LOGGER.debug(
+            f"Fetched Data from Strava API in {time.monotonic() - fetch_started:.2f}s"
+        )
+        return
+
+    async def _backfill_history(self):
+        """
+        Backfills the local history with all older activities of the athlete, page by page
+        Pages are only requested while spare rate limit budget is left, so that webhook updates are never delayed
+        The backfill cursor is persisted with the history, so an interrupted backfill resumes where it stopped
+        """
+        _LOGGER.debug(
+            f"Backfilling the local Strava activity history (before: {self.history.backfill_before})"
+        )
+        while not self.history.backfill_complete:
+            await self.strava_api.async_wait_for_spare_budget(
+                short_term_reserve=HISTORY_BACKFILL_SHORT_TERM_RESERVE,
+                daily_reserve=HISTORY_BACKFILL_DAILY_RESERVE,
+            )
+            raw_activities = await self._fetch_activity_page(
+                per_page=ACTIVITIES_PAGE_SIZE, before=self.history.backfill_before
             )
+            if raw_activities is None:
+                # retried after the next refresh
+                return
+
+            activities, start_timestamps = await self._transform_activity_page(
+                raw_activities, geocode=False
+            )
+            self.history.add_backfill_page(activities, start_timestamps)
+            if len(raw_activities) < ACTIVITIES_PAGE_SIZE:
+                self.history.set_backfill_complete()
+            self._fire_update_events(None, [])
+
+        _LOGGER.debug(
+            f"Local Strava activity history is complete: {len(self.history.activities)} activities"
+        )
+
+    @callback
+    def async_start_backfill(self):
+        """start the history backfill in the background, unless it is complete or already running"""
+        if (
+            self.history.backfill_complete
+            or self._backfill_task is not None
+            or self.deauthorized
+        ):
             return
 
-        self.event_factory(
-            data={
-                "activities": activities,
-                "summary_stats": None if not summary_stats_obj else summary_stats_obj,
-            }
+        async def backfill():
+            try:
+                await self._backfill_history()
+            finally:
+                self._backfill_task = None
+
+        self._backfill_task = self.hass.async_create_task(backfill())
+
+    @callback
+    def async_cancel_backfill(self):
+        if self._backfill_task is not None:
+            self._backfill_task.cancel()
+            self._backfill_task = None
+
+    async def sync_activity(self, activity_id: int, aspect_type: str):
+        """
+        Incrementally syncs a single activity after a webhook event
+        Created and updated activities are fetched from /activities/{id} and patched into the local history
+        Deleted activities are dropped from the local history without any API call
+        Falls back to a full refresh if the local history has not been populated yet
+        """
+        if self.deauthorized:
+            return
+
+        if not self.history.initialized:
+            await self.fetch_strava_data()
+            return
+
+        _LOGGER.debug(f"Syncing Strava activity {activity_id} ({aspect_type})")
+
+        if aspect_type == WEBHOOK_ASPECT_TYPE_DELETE:
+            self.image_updates.pop(activity_id, None)
+            self.image_fingerprints.pop(activity_id, None)
+            self._save_photo_state()
+            if self.history.remove(activity_id):
+                self._fire_update_events(None, [])
+            return
+
+        activity_response = await self.strava_api.async_request(
+            method="GET", url=f"https://www.strava.com/api/v3/activities/{activity_id}",
         )
-        if len(img_urls) > 0:
-            self.event_factory(
-                data={"img_urls": img_urls}, event_type=CONF_IMG_UPDATE_EVENT
+
+        if activity_response.status == 404:
+            # e.g. the activity has been made private
+            self.image_updates.pop(activity_id, None)
+            self.image_fingerprints.pop(activity_id, None)
+            self._save_photo_state()
+            if self.history.remove(activity_id):
+                self._fire_update_events(None, [])
+            return
+
+        if activity_response.status == 429:
+            _LOGGER.warning("Strava API rate limit has been reached")
+            return
+
+        if activity_response.status != 200:
+            _LOGGER.error(
+                f"Could not fetch strava activity {activity_id} (response code: {activity_response.status}): {await activity_response.text()}"
             )
+            return
+
+        raw_activity = json.loads(await activity_response.text())
+        self.athlete_id = int(raw_activity["athlete"]["id"])
+        city = (await self.geocode_activities([raw_activity]))[0]
+
+        is_new_activity = self.history.get(activity_id) is None
+        self.history.upsert(transform_activity(raw_activity, city))
+
+        img_urls = []
+        if activity_id in [
+            activity[CONF_SENSOR_ID]
+            for activity in self.history.activities.latest(MAX_NB_ACTIVITIES)
+        ]:
+            img_urls = await self._fetch_image_urls([activity_id])
+
+        summary_stats_obj = None
+        if is_new_activity:
+            summary_stats_obj = await self._fetch_summary_stats(self.athlete_id)
+
+        self._fire_update_events(summary_stats_obj, img_urls)
         return
 
     async def get(self, request):
@@ -370,27 +796,119 @@ class StravaWebhookView(HomeAssistantView):
 
         return Response(status=HTTP_OK)
 
-    async def post(self, request: Request):
-        """Handle incoming post request"""
-        request_host = request.headers.get("Host", None)
-        _LOGGER.debug(
-            f"Strava Webhook Endppoint received a POST request from: {request_host}"
+    async def async_handle_webhook_event(self, event: dict):
+        """
+        Handles a validated webhook event; called by the worker of the webhook queue
+        Events are routed by object type, aspect type and updated fields:
+        - the athlete revoking access stops all refreshes
+        - title/type changes are patched into the local history without any API call
+        - deleted activities and activities made private are removed without any API call
+        - all other activity events are synced incrementally
+        """
+        if self.deauthorized:
+            return
+
+        updates = event["updates"]
+
+        if event["object_type"] == WEBHOOK_OBJECT_TYPE_ATHLETE:
+            if str(updates.get(WEBHOOK_UPDATE_AUTHORIZED, "")).lower() == "false":
+                self.async_handle_deauthorization()
+            else:
+                _LOGGER.debug(f"Ignoring Strava athlete event: {event}")
+            return
+
+        activity_id = event["object_id"]
+
+        if event["aspect_type"] == WEBHOOK_ASPECT_TYPE_DELETE or (
+            str(updates.get(WEBHOOK_UPDATE_PRIVATE, "")).lower() == "true"
+        ):
+            self.refresh_scheduler.async_request_activity_sync(
+                activity_id=activity_id, aspect_type=WEBHOOK_ASPECT_TYPE_DELETE
+            )
+            return
+
+        if (
+            event["aspect_type"] == WEBHOOK_ASPECT_TYPE_UPDATE
+            and updates
+            and set(updates) <= {WEBHOOK_UPDATE_TITLE, WEBHOOK_UPDATE_TYPE}
+            and self.patch_activity(activity_id, updates)
+        ):
+            return
+
+        self.refresh_scheduler.async_request_activity_sync(
+            activity_id=activity_id, aspect_type=event["aspect_type"],
         )
 
+    @callback
+    def patch_activity(self, activity_id: int, updates: dict) -> bool:
+        """
+        Patches the title and/or type of an activity in the local history
+        Returns False if the activity is not in the local history
+        """
+        activity = self.history.get(activity_id)
+        if activity is None:
+            return False
+
+        patched_activity = {**activity}
+        if WEBHOOK_UPDATE_TITLE in updates:
+            patched_activity[CONF_SENSOR_TITLE] = str(updates[WEBHOOK_UPDATE_TITLE])
+        if WEBHOOK_UPDATE_TYPE in updates:
+            patched_activity[CONF_SENSOR_ACTIVITY_TYPE] = str(
+                updates[WEBHOOK_UPDATE_TYPE]
+            ).lower()
+
+        _LOGGER.debug(f"Patching Strava activity {activity_id}: {updates}")
+        self.history.upsert(patched_activity)
+        self._fire_update_events(None, [])
+        return True
+
+    @callback
+    def async_handle_deauthorization(self):
+        """the athlete revoked the access of Home Assistant to Strava: stop all refreshes"""
+        _LOGGER.error(
+            "Access to Strava has been revoked by the athlete. Please re-install the Strava Home Assistant integration to re-authorize it"
+        )
+        self.deauthorized = True
+        self.refresh_scheduler.async_cancel()
+        self.poller.async_stop()
+        self.async_cancel_backfill()
+
+    async def post(self, request: Request):
+        """
+        Handle incoming post request
+        Events are validated and queued without any further I/O to meet Strava's 2 sec response time
+        """
         try:
             data = await request.json()
-            webhook_id = int(data.get("subscription_id", -1))
-        except JSONDecodeError:
-            webhook_id = -1
+        except (JSONDecodeError, ValueError):
+            data = None
 
-        if webhook_id == self.webhook_id or request_host in self.host:
-            # create asychronous task to meet the 2 sec response time
-            self.hass.async_create_task(self.fetch_strava_data())
+        event = parse_webhook_event(
+            data,
+            subscription_id=self.webhook_id,
+            owner_id=self.owner_id or self.athlete_id,
+        )
+
+        if event is None:
+            _LOGGER.debug(
+                f"Strava Webhook Endpoint ignored an invalid POST request from: {request.headers.get('Host', None)}"
+            )
+        else:
+            _LOGGER.debug(f"Strava Webhook Endpoint received an event: {event}")
+            self.webhook_events.async_submit(event)
 
         # always return a 200 response
         return Response(status=HTTP_OK)
 
 
+def activity_window_option(entry: ConfigEntry) -> int:
+    """configured activity window; windows stored by earlier versions may exceed the maximum"""
+    return min(
+        int(entry.options.get(CONF_ACTIVITY_WINDOW, DEFAULT_ACTIVITY_WINDOW)),
+        MAX_ACTIVITY_WINDOW,
+    )
+
+
 async def renew_webhook_subscription(
     hass: HomeAssistant, entry: ConfigEntry, webhook_view: StravaWebhookView
 ):
@@ -406,8 +924,8 @@ async def renew_webhook_subscription(
     try:
         ha_host = get_url(hass, allow_internal=False, allow_ip=False)
     except NoURLAvailableError:
-        _LOGGER.error(
-            "Your Home Assistant Instance does not seem to have a public URL. The Strava Home Assistant integration requires a public URL"
+        _LOGGER.info(
+            "Your Home Assistant Instance does not seem to have a public URL. Webhook updates are not available; polling the Strava API instead"
         )
         return
 
@@ -494,6 +1012,7 @@ async def renew_webhook_subscription(
             return
 
     hass.config_entries.async_update_entry(entry=entry, data=config_data)
+    webhook_view.webhook_id = config_data[CONF_WEBHOOK_ID]
 
     return True
 
@@ -517,6 +1036,7 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
     Set up Strava Home Assistant config entry initiated through the HASS-UI.
     """
 
+    setup_started = time.monotonic()
     hass.data.setdefault(DOMAIN, {})
 
     # OAuth Stuff
@@ -540,69 +1060,186 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
         hass, entry, implementation
     )
 
-    await oauth_websession.async_ensure_token_valid()
-
     # webhook view to get notifications for strava activity updates
-    def strava_update_event_factory(data, event_type=CONF_STRAVA_DATA_UPDATE_EVENT):
+    def strava_update_event_factory(data, event_type):
         hass.bus.fire(event_type, data)
 
+    coordinator = StravaDataCoordinator(hass)
+    hass.data[DOMAIN]["coordinator"] = coordinator
+
+    geocode_cache = GeocodeCache(hass)
+    history = ActivityHistory(hass)
+    snapshot = DataSnapshot(hass)
+
     strava_webhook_view = StravaWebhookView(
         oauth_websession=oauth_websession,
         event_factory=strava_update_event_factory,
-        host=get_url(hass, allow_internal=False, allow_ip=False),
+        coordinator=coordinator,
         hass=hass,
+        geocode_cache=geocode_cache,
+        history=history,
+        snapshot=snapshot,
+        activity_window=activity_window_option(entry),
     )
 
+    # only local data is loaded during setup; all network I/O runs in the startup pipeline
+    await asyncio.gather(
+        geocode_cache.async_load(),
+        history.async_load(),
+        snapshot.async_load(),
+        strava_webhook_view.async_load_photo_state(),
+    )
+    _LOGGER.debug(
+        f"Loaded local Strava data in {time.monotonic() - setup_started:.2f}s"
+    )
+
+    # webhook events are only accepted for our subscription and athlete
+    strava_webhook_view.webhook_id = entry.data.get(CONF_WEBHOOK_ID)
+    strava_webhook_view.owner_id = (
+        entry.data.get("token", {}).get("athlete", {}).get("id")
+    )
+    strava_webhook_view.webhook_events.async_start()
+
+    # warm start: serve the local history and the last summary stats until the first refresh completes
+    coordinator.async_set_data(
+        activities=history.activities.latest(strava_webhook_view.activity_window),
+        summary_stats=snapshot.summary_stats,
+    )
+    if snapshot.summary_stats:
+        # summary stats are refetched as soon as new activities show up
+        strava_webhook_view.summary_stats_fetched = True
+    strava_webhook_view.publish_aggregates()
+
     hass.http.register_view(strava_webhook_view)
 
-    # event listeners
+    async def async_update_webhook_subscription():
+        """renew the webhook subscription; poll the Strava API instead if webhooks are not available"""
+        try:
+            is_subscribed = await renew_webhook_subscription(
+                hass=hass, entry=entry, webhook_view=strava_webhook_view
+            )
+        except (asyncio.TimeoutError, ClientError) as err:
+            _LOGGER.error(f"Could not renew the Strava Webhook subscription: {err!r}")
+            is_subscribed = False
+        except Exception:  # pylint: disable=broad-except
+            _LOGGER.exception("Unexpected error while renewing the Strava Webhook subscription")
+            is_subscribed = False
+
+        if is_subscribed:
+            strava_webhook_view.poller.async_stop()
+        elif not strava_webhook_view.deauthorized:
+            _LOGGER.warning(
+                "Strava Webhook is not available: falling back to polling the Strava API"
+            )
+            strava_webhook_view.poller.async_start()
+
+    async def async_ensure_token_valid():
+        """refresh the OAuth token if it has expired; returns False if the token could not be refreshed"""
+        try:
+            await oauth_websession.async_ensure_token_valid()
+        except (asyncio.TimeoutError, ClientError) as err:
+            _LOGGER.error(f"Could not refresh the Strava API token: {err!r}")
+            return False
+        except Exception:  # pylint: disable=broad-except
+            _LOGGER.exception("Unexpected error while refreshing the Strava API token")
+            return False
+        return True
+
+    startup_task = None
+
     async def strava_startup_functions():
-        await renew_webhook_subscription(
-            hass=hass, entry=entry, webhook_view=strava_webhook_view
+        """
+        startup pipeline, which runs in the background once HA is up and running
+        the token refresh and the webhook reconciliation are independent of each other and run concurrently;
+        the first refresh is requested once the token is valid
+        both steps handle their own errors, so a failing step never aborts the other one
+        """
+        timings = {}
+
+        async def timed(step, coro):
+            step_started = time.monotonic()
+            try:
+                return await coro
+            finally:
+                timings[step] = f"{time.monotonic() - step_started:.2f}s"
+
+        pipeline_started = time.monotonic()
+        is_token_valid, _ = await asyncio.gather(
+            timed("token", async_ensure_token_valid()),
+            timed("webhook", async_update_webhook_subscription()),
         )
-        await strava_webhook_view.fetch_strava_data()
+        if is_token_valid:
+            strava_webhook_view.refresh_scheduler.async_request_refresh()
+
+        timings["total"] = f"{time.monotonic() - pipeline_started:.2f}s"
+        _LOGGER.debug(f"Strava startup pipeline finished | timings: {timings}")
         return True
 
+    @callback
+    def async_start_startup_pipeline():
+        """run the startup pipeline, unless it is already running"""
+        nonlocal startup_task
+        if startup_task is not None and not startup_task.done():
+            return
+        startup_task = hass.async_create_task(strava_startup_functions())
+
+    remove_ha_start_listener = None
+
+    @callback
     def ha_start_handler(event):
         """
         called when HA rebooted
         i.e. after all webhook views have been registered and are available
         """
-        hass.async_create_task(strava_startup_functions())
+        nonlocal remove_ha_start_listener
+        remove_ha_start_listener = None
+        async_start_startup_pipeline()
+
+    @callback
+    def async_remove_ha_start_listener():
+        if remove_ha_start_listener is not None:
+            remove_ha_start_listener()
 
+    @callback
     def component_reload_handler(event):
         """called when the component reloads"""
-        hass.async_create_task(strava_startup_functions())
-
-    async def async_strava_config_update_handler():
-        """called when user changes sensor configs"""
-        await strava_webhook_view.fetch_strava_data()
-        return
+        if hass.is_running:
+            async_start_startup_pipeline()
 
+    @callback
     def strava_config_update_handler(event):
-        hass.async_create_task(async_strava_config_update_handler())
+        """called when user changes sensor configs"""
+        strava_webhook_view.activity_window = activity_window_option(entry)
+        coordinator.async_update_listeners()
+        strava_webhook_view.refresh_scheduler.async_request_refresh()
 
+    @callback
     def core_config_update_handler(event):
         """
         handles relevant changes to the HA core config.
         In particular, for URL and Unit System changes
         """
         if "external_url" in event.data.keys():
-            hass.async_create_task(
-                renew_webhook_subscription(
-                    hass=hass, entry=entry, webhook_view=strava_webhook_view
-                )
-            )
+            hass.async_create_task(async_update_webhook_subscription())
         if "unit_system" in event.data.keys():
-            hass.async_create_task(strava_webhook_view.fetch_strava_data())
+            coordinator.async_update_listeners()
+            strava_webhook_view.refresh_scheduler.async_request_refresh()
+
+    @callback
+    def aggregate_window_handler(now):
+        """called at midnight, when the aggregate windows move forward"""
+        strava_webhook_view.publish_aggregates()
 
     # register event listeners
     hass.data[DOMAIN]["remove_update_listener"] = []
 
-    # if hass.bus.async_listeners().get(EVENT_HOMEASSISTANT_START, 0) < 1:
-    hass.data[DOMAIN]["remove_update_listener"].append(
-        hass.bus.async_listen(EVENT_HOMEASSISTANT_START, ha_start_handler)
-    )
+    if not hass.is_running:
+        remove_ha_start_listener = hass.bus.async_listen_once(
+            EVENT_HOMEASSISTANT_STARTED, ha_start_handler
+        )
+        hass.data[DOMAIN]["remove_update_listener"].append(
+            async_remove_ha_start_listener
+        )
 
     # if hass.bus.async_listeners().get(EVENT_CORE_CONFIG_UPDATE, 0) < 1:
     hass.data[DOMAIN]["remove_update_listener"].append(
@@ -621,8 +1258,15 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
             )
         )
 
-    hass.data[DOMAIN]["remove_update_listener"] = [
-        entry.add_update_listener(strava_config_update_helper)
+    hass.data[DOMAIN]["remove_update_listener"] += [
+        entry.add_update_listener(strava_config_update_helper),
+        strava_webhook_view.refresh_scheduler.async_cancel,
+        strava_webhook_view.async_cancel_backfill,
+        strava_webhook_view.webhook_events.async_stop,
+        strava_webhook_view.poller.async_stop,
+        async_track_time_change(
+            hass, aggregate_window_handler, hour=0, minute=0, second=0
+        ),
     ]
 
     for component in PLATFORMS:
@@ -630,6 +1274,9 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
             hass.config_entries.async_forward_entry_setup(entry, component)
         )
 
+    _LOGGER.debug(
+        f"Strava Home Assistant set up in {time.monotonic() - setup_started:.2f}s"
+    )
     return True
 
 
@@ -657,10 +1304,18 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry):
         await existing_webhook_subscriptions_response.text()
     )
 
-    if len(existing_webhook_subscriptions) == 1:
+    if not isinstance(existing_webhook_subscriptions, list):
+        _LOGGER.error(
+            f"Could not list the Strava webhook subscriptions: {existing_webhook_subscriptions}"
+        )
+        existing_webhook_subscriptions = []
+    elif not existing_webhook_subscriptions:
+        # instances without a public URL poll the Strava API and have no subscription
+        _LOGGER.debug("No Strava webhook subscription to delete")
+
+    for webhook_subscription in existing_webhook_subscriptions:
         delete_response = await websession.delete(
-            url=WEBHOOK_SUBSCRIPTION_URL
-            + f"/{existing_webhook_subscriptions[0]['id']}",
+            url=WEBHOOK_SUBSCRIPTION_URL + f"/{webhook_subscription['id']}",
             data={
                 "client_id": entry.data[CONF_CLIENT_ID],
                 "client_secret": entry.data[CONF_CLIENT_SECRET],
@@ -669,18 +1324,13 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry):
 
         if delete_response.status == 204:
             _LOGGER.debug(
-                f"Successfully deleted strava webhook subscription for {entry.data[CONF_CALLBACK_URL]}"
+                f"Successfully deleted strava webhook subscription for {webhook_subscription.get(CONF_CALLBACK_URL)}"
             )
         else:
             _LOGGER.error(
-                f"Strava webhook for {entry.data[CONF_CALLBACK_URL]} could not be deleted: {await delete_response.text()}"
+                f"Strava webhook for {webhook_subscription.get(CONF_CALLBACK_URL)} could not be deleted: {await delete_response.text()}"
             )
             return False
-    else:
-        _LOGGER.error(
-            f"Expected 1 webhook subscription for {entry.data[CONF_CALLBACK_URL]}; found: {len(existing_webhook_subscriptions)}"
-        )
-        return False
 
     unload_ok = all(
         await asyncio.gather(
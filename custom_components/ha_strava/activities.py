@@ -0,0 +1,134 @@
+"""Transformation and in-memory storage of Strava activities"""
+# generic imports
+import logging
+from bisect import bisect_left, insort
+from datetime import datetime as dt
+from typing import Optional
+
+# custom module imports
+from .const import (
+    CONF_SENSOR_ID,
+    CONF_SENSOR_DATE,
+    CONF_SENSOR_DURATION,
+    CONF_SENSOR_DISTANCE,
+    CONF_SENSOR_KUDOS,
+    CONF_SENSOR_CALORIES,
+    CONF_SENSOR_ELEVATION,
+    CONF_SENSOR_POWER,
+    CONF_SENSOR_TROPHIES,
+    CONF_SENSOR_TITLE,
+    CONF_SENSOR_CITY,
+    CONF_SENSOR_MOVING_TIME,
+    CONF_SENSOR_ACTIVITY_TYPE,
+    FACTOR_KILOJOULES_TO_KILOCALORIES,
+    MAX_NB_ACTIVITIES,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def transform_activity(activity: dict, city: str) -> dict:
+    """map a raw activity from the Strava API onto the activity dict consumed by the sensors"""
+    return {
+        CONF_SENSOR_ID: activity.get("id"),
+        CONF_SENSOR_TITLE: activity.get("name", "Strava Activity"),
+        CONF_SENSOR_CITY: city,
+        CONF_SENSOR_ACTIVITY_TYPE: activity.get("type", "Ride").lower(),
+        CONF_SENSOR_DISTANCE: float(activity.get("distance", -1)),
+        CONF_SENSOR_DATE: dt.strptime(
+            activity.get("start_date_local", "2000-01-01T00:00:00Z"),
+            "%Y-%m-%dT%H:%M:%SZ",
+        ),
+        CONF_SENSOR_DURATION: float(activity.get("elapsed_time", -1)),
+        CONF_SENSOR_MOVING_TIME: float(activity.get("moving_time", -1)),
+        CONF_SENSOR_KUDOS: int(activity.get("kudos_count", -1)),
+        CONF_SENSOR_CALORIES: int(
+            activity.get("kilojoules", -1 / FACTOR_KILOJOULES_TO_KILOCALORIES)
+            * FACTOR_KILOJOULES_TO_KILOCALORIES
+        ),
+        CONF_SENSOR_ELEVATION: int(activity.get("total_elevation_gain", -1)),
+        CONF_SENSOR_POWER: float(activity.get("average_watts", -1)),
+        CONF_SENSOR_TROPHIES: int(activity.get("achievement_count", -1)),
+    }
+
+
+class ActivityStore:
+    """
+    In-memory store of the most recent Strava activities, ordered by start date
+    Single activities can be added, updated or removed without rebuilding the whole store
+    The store is unbounded if `max_activities` is None
+    """
+
+    def __init__(self, max_activities: Optional[int] = MAX_NB_ACTIVITIES):
+        self._max_activities = max_activities
+        self._activities = {}  # activity id -> activity
+        self._order = []  # (start date, activity id), oldest first
+        self.initialized = False
+
+    def __contains__(self, activity_id) -> bool:
+        return activity_id in self._activities
+
+    def __len__(self) -> int:
+        return len(self._activities)
+
+    def get(self, activity_id) -> Optional[dict]:
+        return self._activities.get(activity_id)
+
+    def replace_all(self, activities: list):
+        """replace the content of the store with a complete list of activities"""
+        self._activities = {}
+        self._order = []
+        for activity in activities:
+            self.upsert(activity)
+        self.initialized = True
+
+    def upsert(self, activity: dict) -> bool:
+        """
+        add or update a single activity
+        returns False if the activity is too old to be kept in the store
+        """
+        activity_id = activity[CONF_SENSOR_ID]
+        self._remove_from_order(activity_id)
+        self._activities[activity_id] = activity
+        insort(self._order, (activity[CONF_SENSOR_DATE], activity_id))
+
+        while (
+            self._max_activities is not None
+            and len(self._order) > self._max_activities
+        ):
+            _, evicted_id = self._order.pop(0)
+            del self._activities[evicted_id]
+
+        return activity_id in self._activities
+
+    def remove(self, activity_id) -> bool:
+        """remove a single activity; returns False if the activity was not in the store"""
+        if activity_id not in self._activities:
+            return False
+        self._remove_from_order(activity_id)
+        del self._activities[activity_id]
+        return True
+
+    def _remove_from_order(self, activity_id):
+        activity = self._activities.get(activity_id)
+        if activity is None:
+            return
+        idx = bisect_left(self._order, (activity[CONF_SENSOR_DATE], activity_id))
+        if idx < len(self._order) and self._order[idx][1] == activity_id:
+            del self._order[idx]
+
+    def as_list(self) -> list:
+        """all activities, newest first"""
+        return [
+            self._activities[activity_id] for _, activity_id in reversed(self._order)
+        ]
+
+    def latest(self, nb_activities: int) -> list:
+        """the `nb_activities` most recent activities, newest first"""
+        if nb_activities <= 0:
+            return []
+        return [
+            self._activities[activity_id]
+            for _, activity_id in reversed(self._order[-nb_activities:])
+        ]
+
@@ -0,0 +1,152 @@
+"""Incrementally maintained activity totals for calendar and rolling time windows"""
+# generic imports
+import heapq
+import logging
+from datetime import datetime as dt, timedelta
+
+# custom module imports
+from .const import (
+    CONF_SENSOR_ID,
+    CONF_SENSOR_DATE,
+    CONF_SENSOR_ACTIVITY_TYPE,
+    CONF_SENSOR_ACTIVITY_COUNT,
+    CONF_SENSOR_DISTANCE,
+    CONF_SENSOR_MOVING_TIME,
+    CONF_SENSOR_ELEVATION,
+    CONF_SENSOR_CALORIES,
+    AGGREGATE_WINDOW_THIS_WEEK,
+    AGGREGATE_WINDOW_LAST_7_DAYS,
+    AGGREGATE_WINDOW_THIS_MONTH,
+    AGGREGATE_WINDOW_ROLLING_28_DAYS,
+    AGGREGATE_WINDOWS,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+AGGREGATE_METRICS = [
+    CONF_SENSOR_DISTANCE,
+    CONF_SENSOR_MOVING_TIME,
+    CONF_SENSOR_ELEVATION,
+    CONF_SENSOR_CALORIES,
+]
+
+
+def empty_totals() -> dict:
+    """totals of a window without any activities"""
+    return {
+        CONF_SENSOR_ACTIVITY_COUNT: 0,
+        **{metric: 0.0 for metric in AGGREGATE_METRICS},
+    }
+
+
+def window_start(window: str, now: dt) -> dt:
+    """
+    start of a time window for a given (local) point in time
+    all windows start at midnight, so they only move once a day
+    """
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    if window == AGGREGATE_WINDOW_THIS_WEEK:
+        return today - timedelta(days=today.weekday())
+    if window == AGGREGATE_WINDOW_LAST_7_DAYS:
+        return today - timedelta(days=6)
+    if window == AGGREGATE_WINDOW_THIS_MONTH:
+        return today.replace(day=1)
+    if window == AGGREGATE_WINDOW_ROLLING_28_DAYS:
+        return today - timedelta(days=27)
+    raise ValueError(f"Unknown aggregate window: {window}")
+
+
+class WindowAggregate:
+    """
+    Running totals per activity type for a single time window
+    Adding or removing an activity adjusts the totals of its activity type directly;
+    activities which drop out of the window are expired from a heap ordered by start date
+    """
+
+    def __init__(self, window: str):
+        self.window = window
+        self._start = None
+        self._contributions = {}  # activity id -> (activity type, start date, metrics)
+        self._expiry = []  # heap of (start date, activity id)
+        self._totals = {}  # activity type -> totals
+
+    def add(self, activity: dict):
+        self.remove(activity[CONF_SENSOR_ID])
+        if self._start is not None and activity[CONF_SENSOR_DATE] < self._start:
+            return
+
+        metrics = {
+            metric: max(float(activity.get(metric, 0)), 0.0)
+            for metric in AGGREGATE_METRICS
+        }
+        activity_type = activity[CONF_SENSOR_ACTIVITY_TYPE]
+        totals = self._totals.setdefault(activity_type, empty_totals())
+        totals[CONF_SENSOR_ACTIVITY_COUNT] += 1
+        for metric, value in metrics.items():
+            totals[metric] += value
+
+        self._contributions[activity[CONF_SENSOR_ID]] = (
+            activity_type,
+            activity[CONF_SENSOR_DATE],
+            metrics,
+        )
+        heapq.heappush(
+            self._expiry, (activity[CONF_SENSOR_DATE], activity[CONF_SENSOR_ID])
+        )
+
+    def remove(self, activity_id):
+        contribution = self._contributions.pop(activity_id, None)
+        if contribution is None:
+            return
+
+        activity_type, _, metrics = contribution
+        totals = self._totals[activity_type]
+        totals[CONF_SENSOR_ACTIVITY_COUNT] -= 1
+        if totals[CONF_SENSOR_ACTIVITY_COUNT] <= 0:
+            del self._totals[activity_type]
+            return
+        for metric, value in metrics.items():
+            totals[metric] -= value
+
+    def expire(self, now: dt):
+        """move the start of the window forward and drop the activities before it"""
+        self._start = window_start(self.window, now)
+        while self._expiry and self._expiry[0][0] < self._start:
+            date, activity_id = heapq.heappop(self._expiry)
+            contribution = self._contributions.get(activity_id)
+            # heap entries of removed or re-dated activities are skipped
+            if contribution is not None and contribution[1] == date:
+                self.remove(activity_id)
+
+    def totals(self) -> dict:
+        """activity type -> totals"""
+        return {
+            activity_type: {**totals} for activity_type, totals in self._totals.items()
+        }
+
+
+class ActivityAggregates:
+    """
+    Totals of distance, moving time, elevation gain, calories and number of activities
+    per activity type for all aggregate windows (see AGGREGATE_WINDOWS)
+    """
+
+    def __init__(self):
+        self._windows = {window: WindowAggregate(window) for window in AGGREGATE_WINDOWS}
+
+    def add(self, activity: dict):
+        """add or update an activity"""
+        for aggregate in self._windows.values():
+            aggregate.add(activity)
+
+    def remove(self, activity_id):
+        for aggregate in self._windows.values():
+            aggregate.remove(activity_id)
+
+    def snapshot(self, now: dt) -> dict:
+        """window -> activity type -> totals, for the given (local) point in time"""
+        snapshot = {}
+        for window, aggregate in self._windows.items():
+            aggregate.expire(now)
+            snapshot[window] = aggregate.totals()
+        return snapshot
@@ -0,0 +1,175 @@
+"""Rate-limit-aware client for the Strava API"""
+# generic imports
+import asyncio
+import logging
+import time
+from typing import Optional, Tuple
+
+# HASS imports
+from homeassistant.helpers import config_entry_oauth2_flow
+
+# custom module imports
+from .const import (
+    RATE_LIMIT_SHORT_TERM_DEFAULT,
+    RATE_LIMIT_SHORT_TERM_WINDOW_SECONDS,
+    RATE_LIMIT_DAILY_DEFAULT,
+    RATE_LIMIT_DAILY_WINDOW_SECONDS,
+    RATE_LIMIT_MAX_RETRIES,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class RateLimitBucket:
+    """
+    Token bucket for one of Strava's rate limit windows
+    Strava's windows are fixed (quarter hours and UTC days), so the bucket refills completely whenever the window resets
+    """
+
+    def __init__(self, limit: int, window_seconds: int):
+        self.limit = limit
+        self.window_seconds = window_seconds
+        self.tokens = limit
+        self.resets_at = self._next_reset(time.time())
+
+    def _next_reset(self, now: float) -> float:
+        return (now // self.window_seconds + 1) * self.window_seconds
+
+    def _refill(self, now: float):
+        if now >= self.resets_at:
+            self.tokens = self.limit
+            self.resets_at = self._next_reset(now)
+
+    def seconds_until_available(self, now: float, reserve: int = 0) -> float:
+        """seconds until more than `reserve` requests are left in the window"""
+        self._refill(now)
+        if self.tokens > reserve:
+            return 0
+        return self.resets_at - now
+
+    def consume(self):
+        self.tokens -= 1
+
+    def update(self, limit: int, usage: int, now: float):
+        """synchronize the bucket with the limit and usage reported by Strava"""
+        self._refill(now)
+        self.limit = limit
+        self.tokens = max(limit - usage, 0)
+
+    def exhaust(self, now: float):
+        self._refill(now)
+        self.tokens = 0
+
+
+def parse_rate_limit_headers(headers, method: str) -> Optional[Tuple[Tuple[int, int], Tuple[int, int]]]:
+    """
+    Parses Strava's rate limit headers into ((short term limit, usage), (daily limit, usage))
+    The stricter read rate limits are used for GET requests if Strava reports them
+    """
+    limit_header, usage_header = "X-RateLimit-Limit", "X-RateLimit-Usage"
+    if method.upper() == "GET" and "X-ReadRateLimit-Limit" in headers:
+        limit_header, usage_header = "X-ReadRateLimit-Limit", "X-ReadRateLimit-Usage"
+
+    try:
+        limits = [int(value) for value in headers[limit_header].split(",")]
+        usages = [int(value) for value in headers[usage_header].split(",")]
+    except (KeyError, ValueError):
+        return None
+
+    if len(limits) != 2 or len(usages) != 2:
+        return None
+
+    return (limits[0], usages[0]), (limits[1], usages[1])
+
+
+class StravaApiClient:
+    """
+    Wrapper around the OAuth2Session for all requests to the Strava API
+    Tracks the 15-minute and daily rate limit windows reported by Strava
+    and delays requests until the next window instead of failing once the limit has been reached
+    """
+
+    def __init__(self, oauth_websession: config_entry_oauth2_flow.OAuth2Session):
+        self.oauth_websession = oauth_websession
+        self.short_term = RateLimitBucket(
+            RATE_LIMIT_SHORT_TERM_DEFAULT, RATE_LIMIT_SHORT_TERM_WINDOW_SECONDS
+        )
+        self.daily = RateLimitBucket(
+            RATE_LIMIT_DAILY_DEFAULT, RATE_LIMIT_DAILY_WINDOW_SECONDS
+        )
+
+    def seconds_until_available(self) -> float:
+        """seconds until the next request can be made without exceeding the rate limits"""
+        now = time.time()
+        return max(
+            self.short_term.seconds_until_available(now),
+            self.daily.seconds_until_available(now),
+        )
+
+    async def async_wait_for_spare_budget(
+        self, short_term_reserve: int, daily_reserve: int
+    ):
+        """
+        waits until more than the reserved number of requests are left in both rate limit windows
+        used by background jobs, so that they never use up the budget of webhook updates
+        """
+        while True:
+            now = time.time()
+            delay = max(
+                self.short_term.seconds_until_available(now, short_term_reserve),
+                self.daily.seconds_until_available(now, daily_reserve),
+            )
+            if delay <= 0:
+                return
+            _LOGGER.debug(
+                f"Not enough spare Strava API budget: waiting {int(delay)} seconds"
+            )
+            await asyncio.sleep(delay + 1)
+
+    async def _async_wait_for_budget(self, url: str):
+        while True:
+            delay = self.seconds_until_available()
+            if delay <= 0:
+                break
+            _LOGGER.warning(
+                f"Strava API rate limit has been reached: delaying request to {url} by {int(delay)} seconds"
+            )
+            # wake up slightly after the window reset
+            await asyncio.sleep(delay + 1)
+        self.short_term.consume()
+        self.daily.consume()
+
+    def _update_rate_limits(self, response, method: str):
+        rate_limits = parse_rate_limit_headers(response.headers, method)
+        if rate_limits is None:
+            return
+        now = time.time()
+        (short_term_limit, short_term_usage), (daily_limit, daily_usage) = rate_limits
+        self.short_term.update(short_term_limit, short_term_usage, now)
+        self.daily.update(daily_limit, daily_usage, now)
+
+    async def async_request(self, method: str, url: str, **kwargs):
+        """
+        Makes a request to the Strava API once there is rate limit budget left
+        Requests that are answered with 429 are retried after the rate limit window has been reset
+        """
+        for attempt in range(RATE_LIMIT_MAX_RETRIES + 1):
+            await self._async_wait_for_budget(url)
+            response = await self.oauth_websession.async_request(
+                method=method, url=url, **kwargs
+            )
+            self._update_rate_limits(response, method)
+
+            if response.status != 429:
+                return response
+
+            _LOGGER.warning(f"Strava API rate limit has been reached ({url})")
+            now = time.time()
+            if self.short_term.tokens > 0:
+                # Strava did not report the usage; assume the short term window is exhausted
+                self.short_term.exhaust(now)
+
+            if attempt == RATE_LIMIT_MAX_RETRIES:
+                return response
+            # return the connection to the pool before waiting for the retry
+            response.release()
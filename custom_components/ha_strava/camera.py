@@ -1,23 +1,34 @@
+import asyncio
 import logging
+from collections import OrderedDict
+from datetime import timedelta
+from aiohttp import ClientError
 from homeassistant.components.camera import Camera
-import requests
+from homeassistant.core import callback
 import os
-import pickle
 from homeassistant.components.local_file.camera import LocalFile
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.event import async_track_time_interval
+from .images import ImageIndex, ImageUrlStore, ImageByteCache, ImageBlobStore
 from .const import (
     DOMAIN,
     CONF_PHOTOS_ENTITY,
     CONF_PHOTOS,
     CONF_IMG_UPDATE_EVENT,
     CONF_IMG_ROTATE_EVENT,
+    CONF_STRAVA_CONFIG_UPDATE_EVENT,
     CONF_IMG_UPDATE_INTERVAL_SECONDS,
     CONF_IMG_UPDATE_INTERVAL_SECONDS_DEFAULT,
     CONF_MAX_NB_IMAGES,
     CONFIG_URL_DUMP_FILENAME,
+    CONFIG_DEFAULT_IMG_FILENAME,
+    IMG_FETCH_TIMEOUT_SECONDS,
+    IMG_PREFETCH_MAX_CONCURRENCY,
+    IMG_VALIDATION_MAX_CONCURRENCY,
+    IMG_VALIDATION_TIMEOUT_SECONDS,
+    IMG_VALIDATION_CACHE_SIZE,
 )
 from hashlib import md5
-from homeassistant.const import EVENT_TIME_CHANGED
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -25,7 +36,7 @@ _LOGGER = logging.getLogger(__name__)
 async def async_setup_entry(hass, config_entry, async_add_entities):
     """
     Set up the Camera that displays images from Strava.
-    Works via image-URLs, not via local file storage
+    Works via image-URLs; images are prefetched into a local blob store and served from disk
     """
 
     if not config_entry.data.get(CONF_PHOTOS, False):
@@ -35,25 +46,47 @@ async def async_setup_entry(hass, config_entry, async_add_entities):
 
     async_add_entities([camera])
 
-    def image_update_listener(event):
-        """listen for time update event (every second) and update images if appropriate"""
-        ha_strava_config_entries = hass.config_entries.async_entries(domain=DOMAIN)
+    remove_rotation_timer = None
 
-        if len(ha_strava_config_entries) != 1:
-            return -1
+    @callback
+    def image_rotation_handler(now):
+        """rotate the camera image once per image update interval"""
+        camera.rotate_img()
+
+    def schedule_image_rotation():
+        """(re-)schedule the rotation timer with the configured image update interval"""
+        nonlocal remove_rotation_timer
+        if remove_rotation_timer is not None:
+            remove_rotation_timer()
 
         img_update_interval_seconds = int(
-            ha_strava_config_entries[0].options.get(
+            config_entry.options.get(
                 CONF_IMG_UPDATE_INTERVAL_SECONDS,
                 CONF_IMG_UPDATE_INTERVAL_SECONDS_DEFAULT,
             )
         )
+        _LOGGER.debug(f"Rotating Strava images every {img_update_interval_seconds}s")
+
+        remove_rotation_timer = async_track_time_interval(
+            hass, image_rotation_handler, timedelta(seconds=img_update_interval_seconds)
+        )
+
+    @callback
+    def strava_config_update_handler(event):
+        """reschedule the rotation timer if the image update interval changed"""
+        schedule_image_rotation()
 
-        if event.data["now"].second % img_update_interval_seconds == 0:
-            camera.rotate_img()
+    def remove_image_rotation():
+        if remove_rotation_timer is not None:
+            remove_rotation_timer()
 
+    schedule_image_rotation()
+
+    hass.data[DOMAIN]["remove_update_listener"].append(remove_image_rotation)
     hass.data[DOMAIN]["remove_update_listener"].append(
-        hass.bus.async_listen(EVENT_TIME_CHANGED, image_update_listener)
+        hass.bus.async_listen(
+            CONF_STRAVA_CONFIG_UPDATE_EVENT, strava_config_update_handler
+        )
     )
 
     return
@@ -63,7 +96,7 @@ class UrlCam(Camera):
     """
     Representation of a camera entity that can display images from Strava Image URL.
     Image URLs are fetched from the strava API and the URLs come as payload of the strava data update event
-    Up to 100 URLs are stored in the Camera object
+    Up to 100 URLs are stored in the Camera object and persisted in HA's .storage directory
     """
 
     def __init__(self, default_enabled=True):
@@ -73,70 +106,155 @@ class UrlCam(Camera):
         self._url_dump_filepath = os.path.join(
             os.path.split(os.path.abspath(__file__))[0], CONFIG_URL_DUMP_FILENAME
         )
-        _LOGGER.debug(f"url dump filepath: {self._url_dump_filepath}")
+        _LOGGER.debug(f"legacy url dump filepath: {self._url_dump_filepath}")
 
-        if os.path.exists(self._url_dump_filepath):
-            with open(self._url_dump_filepath, "rb") as file:
-                self._urls = pickle.load(file)
-        else:
-            self._urls = {}
-            self._pickle_urls()
+        self._max_images = CONF_MAX_NB_IMAGES
+        self._urls = ImageIndex(max_images=self._max_images)
+        self._url_store = None
 
-        self._url_index = 0
         self._default_url = "https://upload.wikimedia.org/wikipedia/commons/thumb/1/15/No_image_available_600_x_450.svg/1280px-No_image_available_600_x_450.svg.png"
-        self._max_images = CONF_MAX_NB_IMAGES
+        self._default_img_filepath = os.path.join(
+            os.path.split(os.path.abspath(__file__))[0], CONFIG_DEFAULT_IMG_FILENAME
+        )
+        self._default_img = None
+        self._img_cache = ImageByteCache()
+        self._img_blob_store = None
+        self._validated_urls = OrderedDict()  # url -> validation result
+        self._retry_img_urls = OrderedDict()  # url id -> image url which could not be validated
         self._default_enabled = default_enabled
 
-    def _pickle_urls(self):
-        """store image urls persistently on hard drive"""
-        with open(self._url_dump_filepath, "wb") as file:
-            pickle.dump(self._urls, file)
-
-    def _return_default_img(self):
-        img_response = requests.get(url=self._default_url)
-        return img_response.content
-
-    def is_url_valid(self, url):
-        """test wethere a n image URL returns a valid resonse"""
-        img_response = requests.get(url=url)
-        if img_response.status_code == 200:
-            return True
-        _LOGGER.error(
-            f"{url} did not return a valid imgage | Response: {img_response.status_code}"
-        )
-        return False
+    def _read_default_img(self):
+        with open(self._default_img_filepath, "rb") as file:
+            return file.read()
 
-    def camera_image(self):
+    async def _async_return_default_img(self):
+        """serve the 'no image' placeholder which is bundled with the integration"""
+        if self._default_img is None:
+            self._default_img = await self.hass.async_add_executor_job(
+                self._read_default_img
+            )
+        return self._default_img
+
+    async def _async_request_url_status(self, url):
+        """
+        request the status of an image URL without downloading the image
+        falls back to a single-byte range request if the CDN does not support HEAD requests
+        """
+        websession = async_get_clientsession(self.hass)
+        async with websession.head(
+            url=url, allow_redirects=True, timeout=IMG_VALIDATION_TIMEOUT_SECONDS
+        ) as img_response:
+            status = img_response.status
+        if status in (403, 405):
+            async with websession.get(
+                url=url,
+                headers={"Range": "bytes=0-0"},
+                timeout=IMG_VALIDATION_TIMEOUT_SECONDS,
+            ) as img_response:
+                status = img_response.status
+        return status
+
+    async def async_is_url_valid(self, url, semaphore, is_retry=False):
+        """
+        test wethere an image URL returns a valid resonse; results are cached per URL
+        returns None if the URL could not be validated, e.g. due to a timeout
+        """
+        if url in self._validated_urls:
+            return self._validated_urls[url]
+
+        async with semaphore:
+            try:
+                status = await self._async_request_url_status(url)
+            except (asyncio.TimeoutError, ClientError) as err:
+                if is_retry:
+                    # repeated failures are expected while the CDN is unavailable
+                    _LOGGER.debug(f"{url} could not be validated again: {err!r}")
+                else:
+                    _LOGGER.error(f"{url} could not be validated: {err!r}")
+                # don't cache failed requests; the URL is queued for another validation attempt
+                return None
+
+        is_valid = status in (200, 206)
+        if not is_valid:
+            _LOGGER.error(f"{url} did not return a valid imgage | Response: {status}")
+
+        self._validated_urls[url] = is_valid
+        while len(self._validated_urls) > IMG_VALIDATION_CACHE_SIZE:
+            self._validated_urls.popitem(last=False)
+        return is_valid
+
+    async def async_camera_image(self, width=None, height=None):
         """Return image response."""
-        if len(self._urls) == self._url_index:
+        url_id = self._urls.current_id
+        if url_id is None:
             _LOGGER.debug("No custom image urls....serving default image")
-            return self._return_default_img()
-
-        img_response = requests.get(
-            url=self._urls[list(self._urls.keys())[self._url_index]]["url"]
+            return await self._async_return_default_img()
+
+        img = self._img_cache.get(url_id)
+        if img is not None:
+            return img
+
+        img = await self._img_blob_store.async_get(url_id)
+        if img is None:
+            img = await self._async_download_img(url_id, self._urls.current)
+        if img is None:
+            return await self._async_return_default_img()
+
+        self._img_cache.set(url_id, img)
+        return img
+
+    async def _async_download_img(self, url_id, img_url):
+        """download an image from the Strava CDN and write it to the blob store"""
+        url = img_url["url"]
+        websession = async_get_clientsession(self.hass)
+        try:
+            async with websession.get(
+                url=url, timeout=IMG_FETCH_TIMEOUT_SECONDS
+            ) as img_response:
+                if img_response.status != 200:
+                    _LOGGER.error(
+                        f"{url} did not return a valid imgage | Response: {img_response.status}"
+                    )
+                    return None
+                img = await img_response.read()
+        except (asyncio.TimeoutError, ClientError) as err:
+            _LOGGER.error(f"{url} could not be fetched: {err!r}")
+            return None
+
+        await self._img_blob_store.async_put(url_id, img_url["date"], img)
+        return img
+
+    async def _async_prefetch_imgs(self, img_urls):
+        """download images which are not in the blob store yet in the background"""
+        semaphore = asyncio.Semaphore(IMG_PREFETCH_MAX_CONCURRENCY)
+
+        async def prefetch(url_id, img_url):
+            async with semaphore:
+                await self._async_download_img(url_id, img_url)
+
+        await asyncio.gather(
+            *[
+                prefetch(url_id, img_url)
+                for url_id, img_url in img_urls.items()
+                if url_id not in self._img_blob_store
+            ]
         )
-        if img_response.status_code == 200:
-            return img_response.content
-        else:
-            _LOGGER.error(
-                f"{self._urls[list(self._urls.keys())[self._url_index]]['url']} did not return a valid imgage | Response: {img_response.status_code}"
-            )
-            return self._return_default_img()
 
     def rotate_img(self):
         _LOGGER.debug(f"Number of images available from Strava: {len(self._urls)}")
         if len(self._urls) == 0:
             return
-        self._url_index = (self._url_index + 1) % len(self._urls)
+        self._urls.rotate()
         self.async_write_ha_state()
         return
         # self.schedule_update_ha_state()
 
     @property
     def state(self):
-        if len(self._urls) == self._url_index:
+        img_url = self._urls.current
+        if img_url is None:
             return self._default_url
-        return self._urls[list(self._urls.keys())[self._url_index]]["url"]
+        return img_url["url"]
 
     @property
     def unique_id(self):
@@ -152,35 +270,79 @@ class UrlCam(Camera):
         return False
 
     @property
-    def device_state_attributes(self):
+    def extra_state_attributes(self):
         """Return the camera state attributes."""
-        if len(self._urls) == self._url_index:
-            return {"img_url": self._default_url}
-        return {"img_url": self._urls[list(self._urls.keys())[self._url_index]]["url"]}
+        return {"img_url": self.state}
+
+    async def _async_add_imgs(self, img_urls):
+        """
+        validate new image urls concurrently and add the valid ones to the camera
+        the camera state is written once the whole batch has been validated
+        valid images are prefetched to disk in the background
+        urls which could not be validated are retried with the next update,
+        as Strava does not resend the urls of unchanged activity photos
+        """
+        retry_url_ids = set(self._retry_img_urls.keys())
+        pending_img_urls = [*self._retry_img_urls.values(), *img_urls]
+        self._retry_img_urls.clear()
+
+        new_img_urls = {}
+        for img_url in pending_img_urls:
+            url_id = md5(img_url["url"].encode()).hexdigest()
+            if url_id not in self._urls:
+                new_img_urls[url_id] = img_url
+
+        if not new_img_urls:
+            return
 
-    def img_update_handler(self, event):
-        """handle new urls of Strava images"""
+        semaphore = asyncio.Semaphore(IMG_VALIDATION_MAX_CONCURRENCY)
+        url_ids = list(new_img_urls.keys())
+        results = await asyncio.gather(
+            *[
+                self.async_is_url_valid(
+                    new_img_urls[url_id]["url"],
+                    semaphore,
+                    is_retry=url_id in retry_url_ids,
+                )
+                for url_id in url_ids
+            ]
+        )
 
-        for img_url in event.data["img_urls"]:
-            if self.is_url_valid(url=img_url["url"]):
-                self._urls[md5(img_url["url"].encode()).hexdigest()] = {**img_url}
+        valid_img_urls = {}
+        for url_id, is_valid in zip(url_ids, results):
+            if is_valid is None:
+                self._retry_img_urls[url_id] = new_img_urls[url_id]
+            elif is_valid and self._urls.add(url_id, {**new_img_urls[url_id]}):
+                valid_img_urls[url_id] = new_img_urls[url_id]
+        while len(self._retry_img_urls) > self._max_images:
+            self._retry_img_urls.popitem(last=False)
+
+        _LOGGER.debug(
+            f"{len(valid_img_urls)} out of {len(new_img_urls)} new Strava images are valid"
+        )
+        if not valid_img_urls:
+            return
 
-        self._urls = {
-            k: v
-            for (k, v) in sorted(
-                list(self._urls.items()), key=lambda k_v: k_v[1]["date"]
-            )
-        }[-self._max_images :]
+        self._url_store.async_schedule_save()
+        self.async_write_ha_state()
+        self.hass.async_create_task(self._async_prefetch_imgs(valid_img_urls))
 
-        self._pickle_urls()
-        return
+    @callback
+    def img_update_handler(self, event):
+        """handle new urls of Strava images"""
+        self.hass.async_create_task(self._async_add_imgs(event.data["img_urls"]))
 
     @property
     def entity_registry_enabled_default(self) -> bool:
         return self._default_enabled
 
     async def async_added_to_hass(self):
+        self._url_store = ImageUrlStore(self.hass, self._url_dump_filepath)
+        await self._url_store.async_load(self._urls)
+        self._img_blob_store = ImageBlobStore(self.hass, max_images=self._max_images)
+        await self._img_blob_store.async_load()
         self.hass.bus.async_listen(CONF_IMG_UPDATE_EVENT, self.img_update_handler)
+        self.hass.async_create_task(self._async_prefetch_imgs(dict(self._urls.items())))
 
     async def async_will_remove_from_hass(self):
         self.hass.bus._async_remove_listener(
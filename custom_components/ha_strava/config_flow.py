@@ -12,10 +12,7 @@ from homeassistant.const import CONF_CLIENT_ID, CONF_CLIENT_SECRET, HTTP_OK
 from homeassistant.core import callback
 from homeassistant.helpers import config_entry_oauth2_flow, config_validation as cv
 from homeassistant.helpers.network import get_url, NoURLAvailableError
-from homeassistant.helpers.entity_registry import (
-    async_get_registry,
-    async_entries_for_config_entry,
-)
+from homeassistant.helpers.entity_registry import async_get_registry
 
 # custom module imports
 from .sensor import StravaSummaryStatsSensor
@@ -32,6 +29,9 @@ from .const import (
     CONF_NB_ACTIVITIES,
     DEFAULT_NB_ACTIVITIES,
     MAX_NB_ACTIVITIES,
+    CONF_ACTIVITY_WINDOW,
+    DEFAULT_ACTIVITY_WINDOW,
+    MAX_ACTIVITY_WINDOW,
     CONF_SENSOR_ACTIVITY_TYPE,
     CONF_SENSOR_DURATION,
     CONF_SENSOR_PACE,
@@ -54,6 +54,12 @@ from .const import (
     CONF_SENSOR_DEFAULT,
     CONF_IMG_UPDATE_INTERVAL_SECONDS,
     CONF_IMG_UPDATE_INTERVAL_SECONDS_DEFAULT,
+    CONF_SUMMARY_ACTIVITY_TYPES,
+    SUMMARY_ACTIVITY_TYPES,
+    DEFAULT_SUMMARY_ACTIVITY_TYPES,
+    CONF_AGGREGATE_WINDOWS,
+    AGGREGATE_WINDOWS,
+    DEFAULT_AGGREGATE_WINDOWS,
 )
 
 _LOGGER = logging.getLogger(__name__)
@@ -78,6 +84,9 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
 
     def __init__(self):
         self._nb_activities = None
+        self._activity_window = None
+        self._summary_activity_types = None
+        self._aggregate_windows = None
         self._config_entry_title = None
 
     async def show_form_init(self):
@@ -106,6 +115,22 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                             msg=f"max = {MAX_NB_ACTIVITIES}",
                         ),
                     ),
+                    vol.Required(
+                        CONF_ACTIVITY_WINDOW,
+                        default=min(
+                            ha_strava_config_entries[0].options.get(
+                                CONF_ACTIVITY_WINDOW, DEFAULT_ACTIVITY_WINDOW
+                            ),
+                            MAX_ACTIVITY_WINDOW,
+                        ),
+                    ): vol.All(
+                        vol.Coerce(int),
+                        vol.Range(
+                            min=MAX_NB_ACTIVITIES,
+                            max=MAX_ACTIVITY_WINDOW,
+                            msg=f"max = {MAX_ACTIVITY_WINDOW}",
+                        ),
+                    ),
                     vol.Required(
                         CONF_IMG_UPDATE_INTERVAL_SECONDS,
                         default=ha_strava_config_entries[0].options.get(
@@ -123,6 +148,18 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                             ha_strava_config_entries[0].data.get(CONF_PHOTOS),
                         ),
                     ): bool,
+                    vol.Required(
+                        CONF_SUMMARY_ACTIVITY_TYPES,
+                        default=ha_strava_config_entries[0].options.get(
+                            CONF_SUMMARY_ACTIVITY_TYPES, DEFAULT_SUMMARY_ACTIVITY_TYPES,
+                        ),
+                    ): cv.multi_select(SUMMARY_ACTIVITY_TYPES),
+                    vol.Required(
+                        CONF_AGGREGATE_WINDOWS,
+                        default=ha_strava_config_entries[0].options.get(
+                            CONF_AGGREGATE_WINDOWS, DEFAULT_AGGREGATE_WINDOWS,
+                        ),
+                    ): cv.multi_select(AGGREGATE_WINDOWS),
                 }
             ),
         )
@@ -200,37 +237,22 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
             return self.async_abort(reason="no_config")
 
         if user_input is not None:
+            # sensor entities are added/removed by the sensor platform; only the camera is enabled/disabled
             _entity_registry = await async_get_registry(hass=self.hass)
-            entities = async_entries_for_config_entry(
-                registry=_entity_registry,
-                config_entry_id=ha_strava_config_entries[0].entry_id,
+            camera_entity_id = _entity_registry.async_get_entity_id(
+                "camera", DOMAIN, CONF_PHOTOS_ENTITY
             )
 
-            for entity in entities:
-
-                try:
-                    if int(entity.entity_id.split("_")[1]) >= int(
-                        user_input[CONF_NB_ACTIVITIES]
-                    ):
-                        _LOGGER.debug(f"disabling entity {entity}")
-                        _entity_registry.async_update_entity(
-                            entity.entity_id, disabled_by="user"
-                        )
-                    else:
-                        _entity_registry.async_update_entity(
-                            entity.entity_id, disabled_by=None
-                        )
-                except ValueError:
-                    if user_input[CONF_PHOTOS]:
-                        _entity_registry.async_update_entity(
-                            entity_id=entity.entity_id, disabled_by=None
-                        )
-                    else:
-                        _entity_registry.async_update_entity(
-                            entity_id=entity.entity_id, disabled_by="user"
-                        )
+            if camera_entity_id:
+                _entity_registry.async_update_entity(
+                    entity_id=camera_entity_id,
+                    disabled_by=None if user_input[CONF_PHOTOS] else "user",
+                )
 
             self._nb_activities = user_input[CONF_NB_ACTIVITIES]
+            self._activity_window = user_input[CONF_ACTIVITY_WINDOW]
+            self._summary_activity_types = user_input[CONF_SUMMARY_ACTIVITY_TYPES]
+            self._aggregate_windows = user_input[CONF_AGGREGATE_WINDOWS]
             self._import_strava_images = user_input[CONF_PHOTOS]
             self._img_update_interval_seconds = int(
                 user_input[CONF_IMG_UPDATE_INTERVAL_SECONDS]
@@ -273,10 +295,13 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
             ha_strava_options[user_input[CONF_SENSOR_ACTIVITY_TYPE]] = sensor_config
 
         ha_strava_options[CONF_NB_ACTIVITIES] = self._nb_activities
+        ha_strava_options[CONF_ACTIVITY_WINDOW] = self._activity_window
         ha_strava_options[
             CONF_IMG_UPDATE_INTERVAL_SECONDS
         ] = self._img_update_interval_seconds
         ha_strava_options[CONF_PHOTOS] = self._import_strava_images
+        ha_strava_options[CONF_SUMMARY_ACTIVITY_TYPES] = self._summary_activity_types
+        ha_strava_options[CONF_AGGREGATE_WINDOWS] = self._aggregate_windows
 
         _LOGGER.debug(f"Strava Config Options: {ha_strava_options}")
         return self.async_create_entry(
@@ -324,11 +349,6 @@ class OAuth2FlowHandler(
         if self.hass.config_entries.async_entries(self.DOMAIN):
             return self.async_abort(reason="already_configured")
 
-        try:
-            get_url(self.hass, allow_internal=False, allow_ip=False)
-        except NoURLAvailableError:
-            return self.async_abort(reason="no_public_url")
-
         if user_input is not None:
             self._import_photos_from_strava = user_input[CONF_PHOTOS]
             config_entry_oauth2_flow.async_register_implementation(
@@ -350,9 +370,13 @@ class OAuth2FlowHandler(
         )
 
     async def async_oauth_create_entry(self, data: dict) -> dict:
-        data[
-            CONF_CALLBACK_URL
-        ] = f"{get_url(self.hass, allow_internal=False, allow_ip=False)}/api/strava/webhook"
+        try:
+            data[
+                CONF_CALLBACK_URL
+            ] = f"{get_url(self.hass, allow_internal=False, allow_ip=False)}/api/strava/webhook"
+        except NoURLAvailableError:
+            # without a public URL, new activities are polled instead of pushed via webhook
+            data[CONF_CALLBACK_URL] = None
         data[CONF_CLIENT_ID] = self.flow_impl.client_id
         data[CONF_CLIENT_SECRET] = self.flow_impl.client_secret
         data[CONF_PHOTOS] = self._import_photos_from_strava
@@ -15,6 +15,15 @@ CONFIG_URL_DUMP_FILENAME = "strava_img_urls.pickle"
 CONF_IMG_UPDATE_INTERVAL_SECONDS = "img_update_interval_seconds"
 CONF_IMG_UPDATE_INTERVAL_SECONDS_DEFAULT = 15
 CONF_MAX_NB_IMAGES = 100
+PHOTO_FETCH_MAX_CONCURRENCY = 4
+CONFIG_DEFAULT_IMG_FILENAME = "no_image.png"
+IMG_CACHE_MAX_BYTES = 16 * 1024 * 1024
+IMG_FETCH_TIMEOUT_SECONDS = 10
+IMG_PREFETCH_MAX_CONCURRENCY = 4
+IMG_VALIDATION_MAX_CONCURRENCY = 8
+IMG_VALIDATION_TIMEOUT_SECONDS = 5
+IMG_VALIDATION_CACHE_SIZE = 1000
+IMG_BLOB_DIRNAME = f"{DOMAIN}_images"
 
 # Webhook & API Specs
 CONF_WEBHOOK_ID = "webhook_id"
@@ -23,16 +32,76 @@ WEBHOOK_SUBSCRIPTION_URL = "https://www.strava.com/api/v3/push_subscriptions"
 CONF_NB_ACTIVITIES = "nb_activities"
 DEFAULT_NB_ACTIVITIES = 2
 MAX_NB_ACTIVITIES = 10
+CONF_ACTIVITY_WINDOW = "activity_window"
+DEFAULT_ACTIVITY_WINDOW = 50
+# the window is listed in the attributes of the history sensor, which older HA versions always record
+MAX_ACTIVITY_WINDOW = 100
+ACTIVITIES_PAGE_SIZE = 200  # max. page size of /athlete/activities
+REFRESH_DEBOUNCE_SECONDS = 5
+POLL_INTERVAL_MIN_SECONDS = 5 * 60  # polling fallback, if webhooks are not available
+POLL_INTERVAL_MAX_SECONDS = 60 * 60
+POLL_PROFILE_NB_ACTIVITIES = 200  # recent activities used to learn the usual activity times
+
+# Rate Limit Specs
+RATE_LIMIT_SHORT_TERM_DEFAULT = 100  # requests per 15 minutes
+RATE_LIMIT_SHORT_TERM_WINDOW_SECONDS = 15 * 60
+RATE_LIMIT_DAILY_DEFAULT = 1000  # requests per day
+RATE_LIMIT_DAILY_WINDOW_SECONDS = 24 * 3600
+RATE_LIMIT_MAX_RETRIES = 3
+HISTORY_BACKFILL_SHORT_TERM_RESERVE = 20  # requests kept for webhook updates
+HISTORY_BACKFILL_DAILY_RESERVE = 200
+
+# Geocoding Specs
+GEOCODE_URL = "https://geocode.xyz"
+GEOCODE_MAX_CONCURRENCY = 4
+GEOCODE_TIMEOUT_SECONDS = 10
+DEFAULT_CITY = "Paradise City"
+GEOCODE_CACHE_PRECISION = 3  # decimals of the rounded start coordinates (~100m)
+GEOCODE_CACHE_TTL_DAYS = 180
+GEOCODE_CACHE_MAX_ENTRIES = 500
+
+# Storage Specs
+STORAGE_VERSION = 1
+STORAGE_KEY_GEOCODE_CACHE = f"{DOMAIN}_geocode_cache"
+STORAGE_KEY_PHOTO_STATE = f"{DOMAIN}_photo_state"
+STORAGE_KEY_IMAGE_BLOBS = f"{DOMAIN}_image_blobs"
+STORAGE_KEY_IMAGE_URLS = f"{DOMAIN}_image_urls"
+STORAGE_KEY_ACTIVITY_HISTORY = f"{DOMAIN}_activity_history"
+STORAGE_KEY_SNAPSHOT = f"{DOMAIN}_snapshot"
+STORAGE_VERSION_IMAGE_URLS = 1
+STORAGE_SAVE_DELAY_SECONDS = 30
 
 # Event Specs
-CONF_STRAVA_DATA_UPDATE_EVENT = "strava_data_update"
 CONF_STRAVA_CONFIG_UPDATE_EVENT = "strava_config_update"
 CONF_STRAVA_RELOAD_EVENT = "ha_strava_reload"
 CONF_IMG_UPDATE_EVENT = "ha_strava_new_images"
 CONF_IMG_ROTATE_EVENT = "ha_strava_rotate_images"
 
+# Dispatcher Signal Specs
+SIGNAL_ACTIVITY_UPDATE = f"{DOMAIN}_activity_update_{{}}"
+SIGNAL_SUMMARY_UPDATE = f"{DOMAIN}_summary_update_{{}}_{{}}"
+SIGNAL_HISTORY_UPDATE = f"{DOMAIN}_history_update"
+SIGNAL_AGGREGATE_UPDATE = f"{DOMAIN}_aggregate_update_{{}}_{{}}"
+SIGNAL_ACTIVITY_TYPES_UPDATE = f"{DOMAIN}_activity_types_update"
+
+# Webhook Event Specs
+WEBHOOK_OBJECT_TYPE_ACTIVITY = "activity"
+WEBHOOK_OBJECT_TYPE_ATHLETE = "athlete"
+WEBHOOK_ASPECT_TYPE_CREATE = "create"
+WEBHOOK_ASPECT_TYPE_UPDATE = "update"
+WEBHOOK_ASPECT_TYPE_DELETE = "delete"
+WEBHOOK_UPDATE_TITLE = "title"
+WEBHOOK_UPDATE_TYPE = "type"
+WEBHOOK_UPDATE_PRIVATE = "private"
+WEBHOOK_UPDATE_AUTHORIZED = "authorized"
+WEBHOOK_QUEUE_MAX_SIZE = 100
+WEBHOOK_DEDUP_TTL_SECONDS = 10 * 60
+WEBHOOK_DEDUP_MAX_ENTRIES = 1000
+
 
 # Sensor Specs
+CONF_HISTORY_ENTITY = "strava_activity_history"
+CONF_SENSOR_ID = "id"
 CONF_SENSOR_DATE = "date"
 CONF_SENSOR_DURATION = "duration"
 CONF_SENSOR_ACTIVITY_COUNT = "activity_count"
@@ -55,6 +124,25 @@ CONF_ACTIVITY_TYPE_HIKE = "hike"
 CONF_ACTIVITY_TYPE_OTHER = "other"
 CONF_SUMMARY_YTD = "summary_ytd"
 CONF_SUMMARY_ALL = "summary_all"
+CONF_SUMMARY_ACTIVITY_TYPES = "summary_activity_types"
+SUMMARY_ACTIVITY_TYPES = {
+    CONF_ACTIVITY_TYPE_RUN: "Run",
+    CONF_ACTIVITY_TYPE_RIDE: "Ride",
+    CONF_ACTIVITY_TYPE_SWIM: "Swim",
+}
+DEFAULT_SUMMARY_ACTIVITY_TYPES = list(SUMMARY_ACTIVITY_TYPES.keys())
+CONF_AGGREGATE_WINDOWS = "aggregate_windows"
+AGGREGATE_WINDOW_THIS_WEEK = "this_week"
+AGGREGATE_WINDOW_LAST_7_DAYS = "last_7_days"
+AGGREGATE_WINDOW_THIS_MONTH = "this_month"
+AGGREGATE_WINDOW_ROLLING_28_DAYS = "rolling_28_days"
+AGGREGATE_WINDOWS = {
+    AGGREGATE_WINDOW_THIS_WEEK: "This week",
+    AGGREGATE_WINDOW_LAST_7_DAYS: "Last 7 days",
+    AGGREGATE_WINDOW_THIS_MONTH: "This month",
+    AGGREGATE_WINDOW_ROLLING_28_DAYS: "Last 28 days",
+}
+DEFAULT_AGGREGATE_WINDOWS = [AGGREGATE_WINDOW_THIS_WEEK, AGGREGATE_WINDOW_THIS_MONTH]
 
 CONF_SENSORS = {
     CONF_SENSOR_DATE: {"icon": "mdi:run"},
@@ -72,6 +160,7 @@ CONF_SENSORS = {
 FACTOR_METER_TO_MILE = 0.000621371
 FACTOR_METER_TO_FEET = 3.28084
 FACTOR_KILOJOULES_TO_KILOCALORIES = 0.239006
+UNIT_KILOCALORIES = "kcal"
 
 CONF_SENSOR_1 = "sensor_1"
 CONF_SENSOR_2 = "sensor_2"
@@ -0,0 +1,151 @@
+"""Coordinator owning the Strava activity data of the sensor entities"""
+# generic imports
+import logging
+from typing import Optional
+
+# HASS imports
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+
+# custom module imports
+from .aggregates import empty_totals
+from .const import (
+    SIGNAL_ACTIVITY_UPDATE,
+    SIGNAL_SUMMARY_UPDATE,
+    SIGNAL_HISTORY_UPDATE,
+    SIGNAL_AGGREGATE_UPDATE,
+    SIGNAL_ACTIVITY_TYPES_UPDATE,
+    MAX_NB_ACTIVITIES,
+    SUMMARY_ACTIVITY_TYPES,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def activity_signal(activity_index: int) -> str:
+    """dispatcher signal for updates of the activity at a given index"""
+    return SIGNAL_ACTIVITY_UPDATE.format(activity_index)
+
+
+def summary_signal(activity_type: str, summary_type: str) -> str:
+    """dispatcher signal for updates of the summary stats of an activity type"""
+    return SIGNAL_SUMMARY_UPDATE.format(activity_type, summary_type)
+
+
+def aggregate_signal(activity_type: str, window: str) -> str:
+    """dispatcher signal for updates of the totals of an activity type in an aggregate window"""
+    return SIGNAL_AGGREGATE_UPDATE.format(activity_type, window)
+
+
+class StravaDataCoordinator:
+    """
+    Owns the latest Strava activities and summary stats, similar to HA's DataUpdateCoordinator
+    Entities are notified through HA's dispatcher, and only if their slice of the data changed
+    """
+
+    def __init__(self, hass: HomeAssistant):
+        self.hass = hass
+        self.activities = []
+        self.summary_stats = None
+        self.aggregates = None
+        self.activity_types = set()  # activity types in the local history
+        self.stats = {"state_writes": 0, "suppressed_state_writes": 0}
+
+    def activity(self, activity_index: int) -> Optional[dict]:
+        """the activity at a given index (newest first); None if there is no such activity"""
+        if activity_index < len(self.activities):
+            return self.activities[activity_index]
+        return None
+
+    def summary(self, activity_type: str, summary_type: str) -> Optional[dict]:
+        """the summary stats of an activity type; None if they have not been fetched yet"""
+        if not self.summary_stats:
+            return None
+        return self.summary_stats[activity_type][summary_type]
+
+    def aggregate(self, activity_type: str, window: str) -> Optional[dict]:
+        """the totals of an activity type in an aggregate window; None if they have not been computed yet"""
+        if self.aggregates is None:
+            return None
+        return self.aggregates[window].get(activity_type, empty_totals())
+
+    @callback
+    def async_set_data(self, activities: list, summary_stats: Optional[dict] = None):
+        """
+        update the activities and (if given) the summary stats
+        notifies the entities whose activity or summary stats changed
+        """
+        old_activities = self.activities
+        self.activities = activities
+
+        changed_signals = [
+            activity_signal(activity_index)
+            for activity_index in range(MAX_NB_ACTIVITIES)
+            if self.activity(activity_index)
+            != (
+                old_activities[activity_index]
+                if activity_index < len(old_activities)
+                else None
+            )
+        ]
+
+        if activities != old_activities:
+            changed_signals.append(SIGNAL_HISTORY_UPDATE)
+
+        if summary_stats:
+            old_summary_stats = self.summary_stats or {}
+            self.summary_stats = summary_stats
+            for activity_type, summaries in summary_stats.items():
+                for summary_type, summary in summaries.items():
+                    if old_summary_stats.get(activity_type, {}).get(summary_type) != summary:
+                        changed_signals.append(summary_signal(activity_type, summary_type))
+
+        _LOGGER.debug(
+            f"Strava data update: notifying {len(changed_signals)} listeners | stats: {self.stats}"
+        )
+        for signal in changed_signals:
+            async_dispatcher_send(self.hass, signal)
+
+    @callback
+    def async_set_aggregates(self, aggregates: dict, activity_types: Optional[set] = None):
+        """
+        update the aggregate totals (window -> activity type -> totals) and (if given) the activity types
+        notifies the entities whose totals changed, and the sensor platform if the activity types changed
+        """
+        if activity_types is not None and activity_types != self.activity_types:
+            self.activity_types = activity_types
+            async_dispatcher_send(self.hass, SIGNAL_ACTIVITY_TYPES_UPDATE)
+
+        old_aggregates = self.aggregates or {}
+        self.aggregates = aggregates
+
+        changed_signals = []
+        for window, totals_per_type in aggregates.items():
+            old_totals_per_type = old_aggregates.get(window, {})
+            for activity_type in set(totals_per_type) | set(old_totals_per_type):
+                if totals_per_type.get(activity_type) != old_totals_per_type.get(
+                    activity_type
+                ):
+                    changed_signals.append(aggregate_signal(activity_type, window))
+
+        for signal in changed_signals:
+            async_dispatcher_send(self.hass, signal)
+
+    @callback
+    def async_update_listeners(self):
+        """notify all entities, e.g. after the sensor options or the unit system changed"""
+        for activity_index in range(MAX_NB_ACTIVITIES):
+            async_dispatcher_send(self.hass, activity_signal(activity_index))
+        async_dispatcher_send(self.hass, SIGNAL_HISTORY_UPDATE)
+        if self.summary_stats:
+            for activity_type, summaries in self.summary_stats.items():
+                for summary_type in summaries:
+                    async_dispatcher_send(
+                        self.hass, summary_signal(activity_type, summary_type)
+                    )
+        if self.aggregates:
+            for window, totals_per_type in self.aggregates.items():
+                for activity_type in set(totals_per_type) | set(SUMMARY_ACTIVITY_TYPES):
+                    async_dispatcher_send(
+                        self.hass, aggregate_signal(activity_type, window)
+                    )
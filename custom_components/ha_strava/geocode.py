@@ -0,0 +1,102 @@
+"""Persistent cache for reverse-geocoded activity locations"""
+# generic imports
+import logging
+import time
+from collections import OrderedDict
+from typing import Optional
+
+# HASS imports
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+# custom module imports
+from .const import (
+    STORAGE_VERSION,
+    STORAGE_KEY_GEOCODE_CACHE,
+    STORAGE_SAVE_DELAY_SECONDS,
+    GEOCODE_CACHE_PRECISION,
+    GEOCODE_CACHE_TTL_DAYS,
+    GEOCODE_CACHE_MAX_ENTRIES,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class GeocodeCache:
+    """
+    Disk-backed cache mapping start coordinates to city names
+    Coordinates are rounded to `precision` decimals, so activities started from the same place share an entry
+    Entries expire after `ttl_days`; the least recently used entries are evicted beyond `max_entries`
+    The cache is persisted in HA's .storage directory
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        precision: int = GEOCODE_CACHE_PRECISION,
+        ttl_days: int = GEOCODE_CACHE_TTL_DAYS,
+        max_entries: int = GEOCODE_CACHE_MAX_ENTRIES,
+    ):
+        self._store = Store(hass, STORAGE_VERSION, STORAGE_KEY_GEOCODE_CACHE)
+        self._precision = precision
+        self._ttl_seconds = ttl_days * 24 * 3600
+        self._max_entries = max_entries
+        self._entries = OrderedDict()
+
+    async def async_load(self):
+        """load cached cities from disk, dropping expired entries"""
+        data = await self._store.async_load()
+        if not data:
+            return
+        now = time.time()
+        for key, entry in sorted(
+            data.get("entries", {}).items(), key=lambda k_v: k_v[1]["last_used"]
+        ):
+            if now - entry["created"] < self._ttl_seconds:
+                self._entries[key] = entry
+        self._evict()
+        _LOGGER.debug(f"Loaded {len(self._entries)} cached geocode entries")
+
+    def key(self, latitude, longitude) -> str:
+        """cache key for a pair of coordinates"""
+        return f"{round(float(latitude or 0), self._precision)},{round(float(longitude or 0), self._precision)}"
+
+    @callback
+    def get(self, latitude, longitude) -> Optional[str]:
+        """return the cached city for the coordinates or None on a cache miss"""
+        key = self.key(latitude, longitude)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        now = time.time()
+        if now - entry["created"] >= self._ttl_seconds:
+            del self._entries[key]
+            self._schedule_save()
+            return None
+
+        entry["last_used"] = now
+        self._entries.move_to_end(key)
+        return entry["city"]
+
+    @callback
+    def set(self, latitude, longitude, city: str):
+        """add a city to the cache and schedule a (delayed) write to disk"""
+        key = self.key(latitude, longitude)
+        now = time.time()
+        self._entries[key] = {"city": city, "created": now, "last_used": now}
+        self._entries.move_to_end(key)
+        self._evict()
+        self._schedule_save()
+
+    def _evict(self):
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    @callback
+    def _schedule_save(self):
+        self._store.async_delay_save(self._data_to_save, STORAGE_SAVE_DELAY_SECONDS)
+
+    @callback
+    def _data_to_save(self) -> dict:
+        return {"entries": dict(self._entries)}
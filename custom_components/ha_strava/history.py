@@ -0,0 +1,179 @@
+"""Persistent local history of all Strava activities of the athlete"""
+# generic imports
+import logging
+from datetime import datetime as dt, timezone
+from typing import Optional
+
+# HASS imports
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+# custom module imports
+from .activities import ActivityStore
+from .aggregates import ActivityAggregates
+from .const import (
+    CONF_SENSOR_ID,
+    CONF_SENSOR_DATE,
+    CONF_SENSOR_ACTIVITY_TYPE,
+    STORAGE_VERSION,
+    STORAGE_KEY_ACTIVITY_HISTORY,
+    STORAGE_SAVE_DELAY_SECONDS,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def start_timestamp(raw_activity: dict) -> int:
+    """UTC start time of a raw Strava activity in epoch seconds, as used by the `before`/`after` cursors"""
+    return int(
+        dt.strptime(
+            raw_activity.get("start_date", "2000-01-01T00:00:00Z"),
+            "%Y-%m-%dT%H:%M:%SZ",
+        )
+        .replace(tzinfo=timezone.utc)
+        .timestamp()
+    )
+
+
+class ActivityHistory:
+    """
+    Disk-backed store of the athlete's activities, persisted in HA's .storage directory
+    The history is backfilled once, page by page towards older activities (`before` cursor);
+    afterwards, it is only topped up with activities after the newest known start time (`after` cursor)
+    Both cursors are persisted, so an interrupted backfill resumes where it stopped
+    Aggregates over recent time windows are updated with every added or removed activity
+    """
+
+    def __init__(self, hass: HomeAssistant):
+        self._store = Store(hass, STORAGE_VERSION, STORAGE_KEY_ACTIVITY_HISTORY)
+        self.activities = ActivityStore(max_activities=None)
+        self.aggregates = ActivityAggregates()
+        self.backfill_before = None  # epoch seconds; oldest activity fetched so far
+        self.backfill_complete = False
+        self.top_up_after = None  # epoch seconds; newest activity fetched so far
+
+    async def async_load(self):
+        """load the activity history and the backfill state from disk"""
+        data = await self._store.async_load()
+        if not data:
+            return
+
+        self.activities.replace_all(
+            [
+                {
+                    **activity,
+                    CONF_SENSOR_DATE: dt.fromisoformat(activity[CONF_SENSOR_DATE]),
+                }
+                for activity in data.get("activities", [])
+            ]
+        )
+        for activity in self.activities.as_list():
+            self.aggregates.add(activity)
+        self.backfill_before = data.get("backfill_before")
+        self.backfill_complete = data.get("backfill_complete", False)
+        self.top_up_after = data.get("top_up_after")
+        _LOGGER.debug(
+            f"Loaded {len(self.activities)} Strava activities from the local history (backfill complete: {self.backfill_complete})"
+        )
+
+    @property
+    def initialized(self) -> bool:
+        """True once the history has been loaded from disk or filled by a fetch"""
+        return self.activities.initialized
+
+    @callback
+    def add_page(self, activities: list, start_timestamps: list):
+        """
+        add a page of transformed activities and advance the top-up cursor
+        `start_timestamps` are the UTC start times of the underlying raw activities
+        """
+        for activity in activities:
+            self.activities.upsert(activity)
+            self.aggregates.add(activity)
+        if start_timestamps:
+            self.top_up_after = max(max(start_timestamps), self.top_up_after or 0)
+            if self.backfill_before is None:
+                # the backfill continues with the activities before the first fetched page
+                self.backfill_before = min(start_timestamps)
+        self.activities.initialized = True
+        self.async_schedule_save()
+
+    @callback
+    def reconcile_latest(self, activities: list, complete: bool = False) -> list:
+        """
+        remove stored activities which are missing from a page of the most recent activities,
+        i.e. activities which have been deleted or made private
+        only activities newer than the oldest activity of the page are checked, unless the page is `complete`
+        returns the ids of the removed activities
+        """
+        if not activities:
+            return []
+
+        oldest_date = min(activity[CONF_SENSOR_DATE] for activity in activities)
+        fetched_ids = {activity[CONF_SENSOR_ID] for activity in activities}
+        removed_ids = [
+            activity[CONF_SENSOR_ID]
+            for activity in self.activities.as_list()
+            if activity[CONF_SENSOR_ID] not in fetched_ids
+            and (complete or activity[CONF_SENSOR_DATE] > oldest_date)
+        ]
+        for activity_id in removed_ids:
+            _LOGGER.debug(f"Removing Strava activity {activity_id}: no longer available")
+            self.remove(activity_id)
+        return removed_ids
+
+    @callback
+    def add_backfill_page(self, activities: list, start_timestamps: list):
+        """add a page of older activities and advance the backfill cursor"""
+        self.add_page(activities, start_timestamps)
+        if start_timestamps:
+            self.backfill_before = min(min(start_timestamps), self.backfill_before)
+
+    @callback
+    def set_backfill_complete(self):
+        self.backfill_complete = True
+        self.async_schedule_save()
+
+    @callback
+    def upsert(self, activity: dict) -> bool:
+        is_stored = self.activities.upsert(activity)
+        self.aggregates.add(activity)
+        self.async_schedule_save()
+        return is_stored
+
+    @callback
+    def remove(self, activity_id) -> bool:
+        is_removed = self.activities.remove(activity_id)
+        self.aggregates.remove(activity_id)
+        if is_removed:
+            self.async_schedule_save()
+        return is_removed
+
+    def get(self, activity_id) -> Optional[dict]:
+        return self.activities.get(activity_id)
+
+    def activity_types(self) -> set:
+        """all activity types in the history"""
+        return {
+            activity[CONF_SENSOR_ACTIVITY_TYPE] for activity in self.activities.as_list()
+        }
+
+    @callback
+    def async_schedule_save(self):
+        """schedule a (delayed) write of the history to disk"""
+
+        def data_to_save():
+            return {
+                "activities": [
+                    {
+                        **activity,
+                        CONF_SENSOR_DATE: activity[CONF_SENSOR_DATE].isoformat(),
+                    }
+                    for activity in self.activities.as_list()
+                ],
+                "backfill_before": self.backfill_before,
+                "backfill_complete": self.backfill_complete,
+                "top_up_after": self.top_up_after,
+            }
+
+        self._store.async_delay_save(data_to_save, STORAGE_SAVE_DELAY_SECONDS)
@@ -0,0 +1,326 @@
+"""Caching of Strava images for the camera entity"""
+# generic imports
+import logging
+import os
+import pickle
+import time
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from datetime import datetime as dt
+from hashlib import sha256
+from typing import Optional
+
+# HASS imports
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store, STORAGE_DIR
+
+# custom module imports
+from .const import (
+    IMG_CACHE_MAX_BYTES,
+    IMG_BLOB_DIRNAME,
+    CONF_MAX_NB_IMAGES,
+    STORAGE_VERSION,
+    STORAGE_KEY_IMAGE_BLOBS,
+    STORAGE_KEY_IMAGE_URLS,
+    STORAGE_VERSION_IMAGE_URLS,
+    STORAGE_SAVE_DELAY_SECONDS,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class ImageIndex:
+    """
+    Date-ordered index of the image urls displayed by the camera
+    The current image is accessed in O(1), new images are inserted in date order with a binary search
+    and the oldest images are evicted beyond `max_images`
+    """
+
+    def __init__(self, max_images: int = CONF_MAX_NB_IMAGES):
+        self._max_images = max_images
+        self._order = []  # (image date, url id), oldest first
+        self._images = {}  # url id -> {"date": ..., "url": ...}
+        self._position = 0
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def __contains__(self, url_id: str) -> bool:
+        return url_id in self._images
+
+    @property
+    def current_id(self) -> Optional[str]:
+        """url id of the image which is currently displayed; None if there are no images"""
+        if not self._order:
+            return None
+        return self._order[self._position][1]
+
+    @property
+    def current(self) -> Optional[dict]:
+        """the image which is currently displayed; None if there are no images"""
+        url_id = self.current_id
+        if url_id is None:
+            return None
+        return self._images[url_id]
+
+    def get(self, url_id: str) -> Optional[dict]:
+        return self._images.get(url_id)
+
+    def items(self):
+        """(url id, image) pairs, oldest first"""
+        return [(url_id, self._images[url_id]) for _, url_id in self._order]
+
+    def add(self, url_id: str, img_url: dict) -> bool:
+        """
+        add (or replace) an image in date order and evict the oldest images beyond max_images
+        returns False if the image is too old to be kept
+        """
+        current_id = self.current_id
+        self._remove_from_order(url_id)
+        self._images[url_id] = img_url
+        insort(self._order, (img_url["date"], url_id))
+
+        while len(self._order) > self._max_images:
+            _, evicted_id = self._order.pop(0)
+            del self._images[evicted_id]
+
+        self._keep_position(current_id)
+        return url_id in self._images
+
+    def remove(self, url_id: str):
+        if url_id not in self._images:
+            return
+        current_id = self.current_id
+        self._remove_from_order(url_id)
+        del self._images[url_id]
+        self._keep_position(current_id)
+
+    def rotate(self):
+        """advance to the next image"""
+        if self._order:
+            self._position = (self._position + 1) % len(self._order)
+
+    def _remove_from_order(self, url_id: str):
+        img_url = self._images.get(url_id)
+        if img_url is None:
+            return
+        idx = bisect_left(self._order, (img_url["date"], url_id))
+        if idx < len(self._order) and self._order[idx][1] == url_id:
+            del self._order[idx]
+
+    def _keep_position(self, current_id: Optional[str]):
+        """keep displaying the same image after the index has been modified"""
+        if current_id in self._images:
+            img_url = self._images[current_id]
+            self._position = bisect_left(self._order, (img_url["date"], current_id))
+        elif self._order:
+            self._position %= len(self._order)
+        else:
+            self._position = 0
+
+
+class ImageUrlStore:
+    """
+    Persists the camera's image urls in HA's .storage directory
+    Saves are delayed, so a batch of updates results in a single (atomic) write
+    Image urls from the legacy pickle dump are imported once; the dump is only removed after the import has been saved
+    """
+
+    def __init__(self, hass: HomeAssistant, legacy_dump_filepath: str):
+        self._hass = hass
+        self._legacy_dump_filepath = legacy_dump_filepath
+        self._store = Store(hass, STORAGE_VERSION_IMAGE_URLS, STORAGE_KEY_IMAGE_URLS)
+        self._image_index = None
+
+    def _load_legacy_dump(self) -> Optional[dict]:
+        if not os.path.exists(self._legacy_dump_filepath):
+            return None
+        with open(self._legacy_dump_filepath, "rb") as file:
+            return pickle.load(file)
+
+    def _remove_legacy_dump(self):
+        os.remove(self._legacy_dump_filepath)
+
+    async def async_load(self, image_index: ImageIndex):
+        """load the persisted image urls into an image index"""
+        self._image_index = image_index
+        data = await self._store.async_load()
+
+        if data is None:
+            legacy_img_urls = await self._hass.async_add_executor_job(
+                self._load_legacy_dump
+            )
+            if legacy_img_urls is None:
+                return
+
+            _LOGGER.debug(f"Importing {len(legacy_img_urls)} legacy image urls")
+            for url_id, img_url in legacy_img_urls.items():
+                image_index.add(url_id, img_url)
+            await self._store.async_save(self._data_to_save())
+            await self._hass.async_add_executor_job(self._remove_legacy_dump)
+            return
+
+        for img_url in data.get("images", []):
+            image_index.add(
+                img_url["id"],
+                {"date": dt.fromisoformat(img_url["date"]), "url": img_url["url"]},
+            )
+
+    @callback
+    def async_schedule_save(self):
+        self._store.async_delay_save(self._data_to_save, STORAGE_SAVE_DELAY_SECONDS)
+
+    @callback
+    def _data_to_save(self) -> dict:
+        return {
+            "images": [
+                {"id": url_id, "date": img_url["date"].isoformat(), "url": img_url["url"]}
+                for url_id, img_url in self._image_index.items()
+            ]
+        }
+
+
+class ImageByteCache:
+    """
+    In-memory LRU cache for image bytes, keyed by the md5 ids of the image urls
+    The least recently used images are evicted once the cache exceeds `max_bytes`
+    """
+
+    def __init__(self, max_bytes: int = IMG_CACHE_MAX_BYTES):
+        self._max_bytes = max_bytes
+        self._size = 0
+        self._images = OrderedDict()
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._images
+
+    def get(self, key: str) -> Optional[bytes]:
+        image = self._images.get(key)
+        if image is not None:
+            self._images.move_to_end(key)
+        return image
+
+    def set(self, key: str, image: bytes):
+        if len(image) > self._max_bytes:
+            return
+        self.remove(key)
+        self._images[key] = image
+        self._size += len(image)
+        while self._size > self._max_bytes:
+            _, evicted = self._images.popitem(last=False)
+            self._size -= len(evicted)
+
+    def remove(self, key: str):
+        image = self._images.pop(key, None)
+        if image is not None:
+            self._size -= len(image)
+
+
+class ImageBlobStore:
+    """
+    Content-addressed on-disk store for Strava images under HA's config directory
+    Blobs are named after the sha256 digest of their content; an index maps the md5 url ids onto the blobs
+    Beyond `max_images` images, the oldest ones (by image date, then by last access) are evicted
+    """
+
+    def __init__(self, hass: HomeAssistant, max_images: int = CONF_MAX_NB_IMAGES):
+        self._hass = hass
+        self._max_images = max_images
+        self._directory = hass.config.path(STORAGE_DIR, IMG_BLOB_DIRNAME)
+        self._store = Store(hass, STORAGE_VERSION, STORAGE_KEY_IMAGE_BLOBS)
+        self._index = {}  # url id -> {"digest": ..., "date": ..., "last_access": ...}
+
+    def __contains__(self, url_id: str) -> bool:
+        return url_id in self._index
+
+    async def async_load(self):
+        """load the blob index from disk"""
+        data = await self._store.async_load()
+        if data:
+            self._index = data.get("images", {})
+        _LOGGER.debug(f"Loaded {len(self._index)} Strava images from {self._directory}")
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self._directory, f"{digest}.jpg")
+
+    def _read_blob(self, digest: str) -> Optional[bytes]:
+        try:
+            with open(self._blob_path(digest), "rb") as file:
+                return file.read()
+        except OSError:
+            return None
+
+    def _write_blob(self, digest: str, image: bytes):
+        path = self._blob_path(digest)
+        if os.path.exists(path):
+            return
+        os.makedirs(self._directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as file:
+            file.write(image)
+        os.replace(tmp_path, path)
+
+    def _delete_blobs(self, digests: list):
+        for digest in digests:
+            try:
+                os.remove(self._blob_path(digest))
+            except OSError:
+                pass
+
+    async def async_get(self, url_id: str) -> Optional[bytes]:
+        """read the image for a url id from disk; returns None if it is not stored"""
+        entry = self._index.get(url_id)
+        if entry is None:
+            return None
+
+        image = await self._hass.async_add_executor_job(
+            self._read_blob, entry["digest"]
+        )
+        if image is None:
+            # blob vanished from disk
+            del self._index[url_id]
+            self._schedule_save()
+            return None
+
+        entry["last_access"] = time.time()
+        self._schedule_save()
+        return image
+
+    async def async_put(self, url_id: str, date: dt, image: bytes):
+        """write an image to disk and evict the oldest images beyond max_images"""
+        digest = sha256(image).hexdigest()
+        await self._hass.async_add_executor_job(self._write_blob, digest, image)
+        self._index[url_id] = {
+            "digest": digest,
+            "date": date.isoformat(),
+            "last_access": time.time(),
+        }
+        await self._async_evict()
+        self._schedule_save()
+
+    async def _async_evict(self):
+        if len(self._index) <= self._max_images:
+            return
+
+        evicted_url_ids = sorted(
+            self._index.keys(),
+            key=lambda url_id: (
+                self._index[url_id]["date"],
+                self._index[url_id]["last_access"],
+            ),
+        )[: len(self._index) - self._max_images]
+        evicted_digests = {self._index.pop(url_id)["digest"] for url_id in evicted_url_ids}
+
+        # identical images share a blob; keep blobs which are still referenced
+        evicted_digests -= {entry["digest"] for entry in self._index.values()}
+        await self._hass.async_add_executor_job(
+            self._delete_blobs, list(evicted_digests)
+        )
+
+    @callback
+    def _schedule_save(self):
+        self._store.async_delay_save(self._data_to_save, STORAGE_SAVE_DELAY_SECONDS)
+
+    @callback
+    def _data_to_save(self) -> dict:
+        return {"images": self._index}
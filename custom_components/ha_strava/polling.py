@@ -0,0 +1,133 @@
+"""Adaptive polling of the Strava API for instances without a public URL"""
+# generic imports
+import logging
+from datetime import datetime as dt, timedelta
+from typing import Callable
+
+# HASS imports
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.util import dt as dt_util
+
+# custom module imports
+from .api import StravaApiClient
+from .history import ActivityHistory
+from .const import (
+    CONF_SENSOR_DATE,
+    CONF_SENSOR_DURATION,
+    POLL_INTERVAL_MIN_SECONDS,
+    POLL_INTERVAL_MAX_SECONDS,
+    POLL_PROFILE_NB_ACTIVITIES,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+HOURS_PER_WEEK = 7 * 24
+
+
+def activity_profile(activities: list) -> list:
+    """
+    relative activity level (0..1) for every hour of the week (Monday 0:00 = 0)
+    based on the (local) end times of the given activities, i.e. when new activities are usually uploaded
+    every activity also counts for the neighbouring hours and, with a lower weight, for the same hour on other days
+    """
+    counts = [0] * HOURS_PER_WEEK
+    for activity in activities:
+        end = activity[CONF_SENSOR_DATE] + timedelta(
+            seconds=max(activity.get(CONF_SENSOR_DURATION, 0), 0)
+        )
+        counts[end.weekday() * 24 + end.hour] += 1
+
+    profile = [0.0] * HOURS_PER_WEEK
+    for hour, count in enumerate(counts):
+        if count == 0:
+            continue
+        for offset, weight in [(-1, 0.5), (0, 1.0), (1, 1.0), (2, 0.5)]:
+            profile[(hour + offset) % HOURS_PER_WEEK] += weight * count
+            for day in range(1, 7):
+                profile[(hour + offset + day * 24) % HOURS_PER_WEEK] += (
+                    0.25 * weight * count
+                )
+
+    max_level = max(profile)
+    if max_level <= 0:
+        return profile
+    return [level / max_level for level in profile]
+
+
+class AdaptivePoller:
+    """
+    Polls for new Strava activities if webhook updates are not available
+    Polls every `min_interval` seconds during the hours the athlete usually finishes activities
+    and backs off to `max_interval` seconds during idle hours
+    Polls share the rate limit budget of the Strava API client with all other requests and are delayed once it is used up
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        history: ActivityHistory,
+        strava_api: StravaApiClient,
+        request_refresh: Callable[[], None],
+        min_interval: int = POLL_INTERVAL_MIN_SECONDS,
+        max_interval: int = POLL_INTERVAL_MAX_SECONDS,
+    ):
+        self._hass = hass
+        self._history = history
+        self._strava_api = strava_api
+        self._request_refresh = request_refresh
+        self._min_interval = min_interval
+        self._max_interval = max_interval
+        self._profile = None
+        self._profile_size = None  # number of activities in the history when the profile was computed
+        self._remove_timer = None
+
+    @property
+    def active(self) -> bool:
+        return self._remove_timer is not None
+
+    def _activity_level(self, now: dt) -> float:
+        if self._profile is None or self._profile_size != len(self._history.activities):
+            self._profile = activity_profile(
+                self._history.activities.latest(POLL_PROFILE_NB_ACTIVITIES)
+            )
+            self._profile_size = len(self._history.activities)
+        return self._profile[now.weekday() * 24 + now.hour]
+
+    def next_interval(self, now: dt) -> float:
+        """seconds until the next poll for a given (local) point in time"""
+        level = self._activity_level(now)
+        return self._max_interval - level * (self._max_interval - self._min_interval)
+
+    @callback
+    def _schedule(self, delay: float):
+        self._remove_timer = async_call_later(self._hass, delay, self._poll)
+
+    @callback
+    def _poll(self, now):
+        budget_delay = self._strava_api.seconds_until_available()
+        if budget_delay > 0:
+            _LOGGER.debug(
+                f"Strava API rate limit has been reached: delaying poll by {int(budget_delay)} seconds"
+            )
+            self._schedule(budget_delay + 1)
+            return
+
+        self._request_refresh()
+        interval = self.next_interval(dt_util.now().replace(tzinfo=None))
+        _LOGGER.debug(f"Next poll of the Strava API in {int(interval)} seconds")
+        self._schedule(interval)
+
+    @callback
+    def async_start(self):
+        """start polling, unless polling is already active"""
+        if self.active:
+            return
+        _LOGGER.info("Polling the Strava API for new activities")
+        self._schedule(self.next_interval(dt_util.now().replace(tzinfo=None)))
+
+    @callback
+    def async_stop(self):
+        if self._remove_timer is not None:
+            self._remove_timer()
+            self._remove_timer = None
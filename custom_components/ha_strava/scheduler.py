@@ -0,0 +1,103 @@
+"""Single-flight scheduling of Strava data refreshes"""
+# generic imports
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Awaitable, Callable
+
+# HASS imports
+from homeassistant.core import HomeAssistant, callback
+
+# custom module imports
+from .const import REFRESH_DEBOUNCE_SECONDS, WEBHOOK_ASPECT_TYPE_DELETE
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class RefreshScheduler:
+    """
+    Runs at most one Strava data refresh at a time
+    Triggers that arrive while a refresh is pending or running are merged into at most one follow-up run
+    Every run waits for a debounce window first, so bursts of webhook events collapse into a single run
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        full_refresh: Callable[[], Awaitable],
+        sync_activity: Callable[[int, str], Awaitable],
+        debounce_seconds: float = REFRESH_DEBOUNCE_SECONDS,
+    ):
+        self._hass = hass
+        self._full_refresh = full_refresh
+        self._sync_activity = sync_activity
+        self._debounce_seconds = debounce_seconds
+        self._full_refresh_requested = False
+        self._pending_activity_events = OrderedDict()  # activity id -> aspect type
+        self._task = None
+        self.stats = {"triggers": 0, "runs": 0, "coalesced": 0}
+
+    @callback
+    def async_request_refresh(self):
+        """request a full refresh of all activities"""
+        self._full_refresh_requested = True
+        self._trigger()
+
+    @callback
+    def async_request_activity_sync(self, activity_id: int, aspect_type: str):
+        """request an incremental sync of a single activity"""
+        self._pending_activity_events.pop(activity_id, None)
+        self._pending_activity_events[activity_id] = aspect_type
+        self._trigger()
+
+    @callback
+    def async_cancel(self):
+        """cancel pending and running refreshes"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self._full_refresh_requested = False
+        self._pending_activity_events.clear()
+
+    def _has_pending_work(self) -> bool:
+        return self._full_refresh_requested or len(self._pending_activity_events) > 0
+
+    @callback
+    def _trigger(self):
+        self.stats["triggers"] += 1
+        if self._task is not None:
+            self.stats["coalesced"] += 1
+            return
+        self._task = self._hass.async_create_task(self._run())
+
+    async def _run(self):
+        try:
+            while self._has_pending_work():
+                await asyncio.sleep(self._debounce_seconds)
+
+                full_refresh = self._full_refresh_requested
+                activity_events = list(self._pending_activity_events.items())
+                self._full_refresh_requested = False
+                self._pending_activity_events.clear()
+
+                self.stats["runs"] += 1
+                _LOGGER.debug(f"Running Strava data refresh | stats: {self.stats}")
+
+                try:
+                    if full_refresh:
+                        # deletes are applied locally; a full refresh would not remove older activities
+                        for activity_id, aspect_type in activity_events:
+                            if aspect_type == WEBHOOK_ASPECT_TYPE_DELETE:
+                                await self._sync_activity(activity_id, aspect_type)
+                        # a full refresh supersedes all other pending single-activity syncs
+                        await self._full_refresh()
+                    else:
+                        for activity_id, aspect_type in activity_events:
+                            await self._sync_activity(activity_id, aspect_type)
+                except asyncio.CancelledError:
+                    raise
+                except Exception:  # pylint: disable=broad-except
+                    _LOGGER.exception("Unexpected error while refreshing Strava data")
+        finally:
+            if self._task is asyncio.current_task():
+                self._task = None
@@ -5,24 +5,44 @@ from aiohttp import ClientSession
 import logging
 
 # HASS imports
-from homeassistant.helpers.entity import Entity
+from homeassistant.core import callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.components.sensor import (
+    SensorEntity,
+    STATE_CLASS_MEASUREMENT,
+    STATE_CLASS_TOTAL_INCREASING,
+)
 from homeassistant.helpers.network import get_url
+from homeassistant.helpers.entity_registry import (
+    async_get as async_get_entity_registry,
+    async_entries_for_config_entry,
+)
 from homeassistant.const import (
+    DEVICE_CLASS_POWER,
     LENGTH_MILES,
     LENGTH_KILOMETERS,
     LENGTH_METERS,
     LENGTH_FEET,
+    POWER_WATT,
     SPEED_KILOMETERS_PER_HOUR,
     SPEED_MILES_PER_HOUR,
+    TIME_HOURS,
     TIME_MINUTES,
 )
 
 # custom module imports
+from .coordinator import (
+    StravaDataCoordinator,
+    activity_signal,
+    summary_signal,
+    aggregate_signal,
+)
 from .const import (
     DOMAIN,
-    CONF_STRAVA_DATA_UPDATE_EVENT,
     CONF_STRAVA_RELOAD_EVENT,
+    CONF_STRAVA_CONFIG_UPDATE_EVENT,
     CONF_SENSORS,
+    CONF_SENSOR_ID,
     CONF_SENSOR_DATE,
     CONF_SENSOR_DURATION,
     CONF_SENSOR_PACE,
@@ -38,63 +58,220 @@ from .const import (
     CONF_SENSOR_CITY,
     CONF_SENSOR_MOVING_TIME,
     CONF_SENSOR_ACTIVITY_TYPE,
-    CONF_ACTIVITY_TYPE_RUN,
     CONF_ACTIVITY_TYPE_SWIM,
     CONF_ACTIVITY_TYPE_RIDE,
     CONF_SUMMARY_YTD,
     CONF_SUMMARY_ALL,
     FACTOR_METER_TO_MILE,
     FACTOR_METER_TO_FEET,
+    UNIT_KILOCALORIES,
+    CONF_NB_ACTIVITIES,
     DEFAULT_NB_ACTIVITIES,
     MAX_NB_ACTIVITIES,
+    CONF_SUMMARY_ACTIVITY_TYPES,
+    DEFAULT_SUMMARY_ACTIVITY_TYPES,
     CONF_SENSOR_DEFAULT,
+    CONF_HISTORY_ENTITY,
+    SIGNAL_HISTORY_UPDATE,
+    SIGNAL_ACTIVITY_TYPES_UPDATE,
+    CONF_AGGREGATE_WINDOWS,
+    DEFAULT_AGGREGATE_WINDOWS,
+    AGGREGATE_WINDOWS,
+    AGGREGATE_WINDOW_LAST_7_DAYS,
+    AGGREGATE_WINDOW_ROLLING_28_DAYS,
 )
 
 _LOGGER = logging.getLogger(__name__)
 
 
+def format_duration(seconds: float) -> str:
+    """format a duration in seconds as [d Day(s), ][hh:][mm:]ss"""
+    days = int(seconds // (3600 * 24))
+    hours = int((seconds - days * (3600 * 24)) // 3600)
+    minutes = int((seconds - days * (3600 * 24) - hours * 3600) // 60)
+    seconds = int(seconds - days * (3600 * 24) - hours * 3600 - minutes * 60)
+    return "".join(
+        [
+            "" if days == 0 else f"{days} Day(s), ",
+            "" if hours == 0 and days == 0 else f"{hours:02}:",
+            "" if minutes == 0 and hours == 0 else f"{minutes:02}:",
+            f"{seconds:02}",
+        ]
+    )
+
+
 async def async_setup_entry(hass, config_entry, async_add_entities):
     """
-    create 5+1 sensor entities for 10 devices
-    all sensor entities are hidden by default
+    create 5+1 sensor entities for each of the configured number of activities
+    and summary sensors for the configured activity types
+    entities are added and removed when the options change
     """
-    entries = [
-        StravaStatsSensor(activity_index=activity_index, sensor_index=sensor_index)
-        for sensor_index in range(6)
-        for activity_index in range(MAX_NB_ACTIVITIES)
-    ]
-
-    for activity_type in [
-        CONF_ACTIVITY_TYPE_RUN,
-        CONF_ACTIVITY_TYPE_RIDE,
-        CONF_ACTIVITY_TYPE_SWIM,
-    ]:
-        for metric in [
-            CONF_SENSOR_DISTANCE,
-            CONF_SENSOR_MOVING_TIME,
-            CONF_SENSOR_ACTIVITY_COUNT,
-        ]:
-            for summary_type in [CONF_SUMMARY_YTD, CONF_SUMMARY_ALL]:
-                entries.append(
-                    StravaSummaryStatsSensor(
-                        activity_type=activity_type,
-                        metric=metric,
-                        summary_type=summary_type,
-                    )
+    coordinator = hass.data[DOMAIN]["coordinator"]
+    entities = {}  # unique id -> entity
+
+    def configured_entities():
+        nb_activities = int(
+            config_entry.options.get(CONF_NB_ACTIVITIES, DEFAULT_NB_ACTIVITIES)
+        )
+        summary_activity_types = config_entry.options.get(
+            CONF_SUMMARY_ACTIVITY_TYPES, DEFAULT_SUMMARY_ACTIVITY_TYPES
+        )
+
+        configured = {CONF_HISTORY_ENTITY: (StravaActivityHistorySensor, {})}
+        for activity_index in range(min(nb_activities, MAX_NB_ACTIVITIES)):
+            for sensor_index in range(6):
+                configured[f"strava_{activity_index}_{sensor_index}"] = (
+                    StravaStatsSensor,
+                    {"activity_index": activity_index, "sensor_index": sensor_index},
                 )
 
-    async_add_entities(entries)
+        for activity_type in summary_activity_types:
+            for metric in [
+                CONF_SENSOR_DISTANCE,
+                CONF_SENSOR_MOVING_TIME,
+                CONF_SENSOR_ACTIVITY_COUNT,
+            ]:
+                for summary_type in [CONF_SUMMARY_YTD, CONF_SUMMARY_ALL]:
+                    configured[
+                        f"strava_stats_{summary_type}_{activity_type}_{metric}"
+                    ] = (
+                        StravaSummaryStatsSensor,
+                        {
+                            "activity_type": activity_type,
+                            "metric": metric,
+                            "summary_type": summary_type,
+                        },
+                    )
+
+        aggregate_windows = config_entry.options.get(
+            CONF_AGGREGATE_WINDOWS, DEFAULT_AGGREGATE_WINDOWS
+        )
+        # totals are computed for every activity type in the local history
+        aggregate_activity_types = list(summary_activity_types) + sorted(
+            coordinator.activity_types - set(summary_activity_types)
+        )
+        for window in aggregate_windows:
+            for activity_type in aggregate_activity_types:
+                for metric in [
+                    CONF_SENSOR_DISTANCE,
+                    CONF_SENSOR_MOVING_TIME,
+                    CONF_SENSOR_ELEVATION,
+                    CONF_SENSOR_CALORIES,
+                    CONF_SENSOR_ACTIVITY_COUNT,
+                ]:
+                    configured[f"strava_aggregate_{window}_{activity_type}_{metric}"] = (
+                        StravaAggregateSensor,
+                        {
+                            "activity_type": activity_type,
+                            "metric": metric,
+                            "window": window,
+                        },
+                    )
+        return configured
+
+    @callback
+    def async_update_entities():
+        """add entities which have been configured and remove entities which are no longer configured"""
+        configured = configured_entities()
+        entity_registry = async_get_entity_registry(hass)
+
+        for unique_id in [uid for uid in entities if uid not in configured]:
+            entity = entities.pop(unique_id)
+            _LOGGER.debug(f"Removing entity {entity.entity_id}")
+            if entity_registry.async_is_registered(entity.entity_id):
+                entity_registry.async_remove(entity.entity_id)
+            else:
+                hass.async_create_task(entity.async_remove())
+
+        new_entities = []
+        for unique_id, (entity_class, kwargs) in configured.items():
+            if unique_id in entities:
+                continue
+            entities[unique_id] = entity_class(coordinator=coordinator, **kwargs)
+            new_entities.append(entities[unique_id])
+
+        if new_entities:
+            async_add_entities(new_entities)
+
+    @callback
+    def strava_config_update_handler(event):
+        async_update_entities()
+
+    @callback
+    def activity_types_update_handler():
+        """create aggregate sensors for activity types which show up in the history for the first time"""
+        async_update_entities()
+
+    # remove entities which have been registered by earlier versions but are not configured
+    entity_registry = async_get_entity_registry(hass)
+    configured = configured_entities()
+    for registry_entry in async_entries_for_config_entry(
+        entity_registry, config_entry.entry_id
+    ):
+        if (
+            registry_entry.domain == "sensor"
+            and registry_entry.unique_id not in configured
+        ):
+            entity_registry.async_remove(registry_entry.entity_id)
+
+    async_update_entities()
+
+    hass.data[DOMAIN]["remove_update_listener"].append(
+        hass.bus.async_listen(
+            CONF_STRAVA_CONFIG_UPDATE_EVENT, strava_config_update_handler
+        )
+    )
+    hass.data[DOMAIN]["remove_update_listener"].append(
+        async_dispatcher_connect(
+            hass, SIGNAL_ACTIVITY_TYPES_UPDATE, activity_types_update_handler
+        )
+    )
 
     # make a post request to the webhook enpoint to initiate a data refresh
     hass.bus.fire(CONF_STRAVA_RELOAD_EVENT, {"component": DOMAIN})
     return
 
 
-class StravaSummaryStatsSensor(Entity):
+class StravaBaseSensor(SensorEntity):
+    """
+    Base class for Strava sensors
+    State writes are skipped if the rendered state and attributes did not change since the last write
+    """
+
+    _coordinator = None
+    _last_written = None
+
+    def _render(self):
+        return (
+            self.native_value,
+            self.name,
+            self.icon,
+            self.native_unit_of_measurement,
+            self.device_class,
+            self.state_class,
+            self.extra_state_attributes,
+        )
+
+    @callback
+    def async_write_ha_state_if_changed(self):
+        """write the entity state unless it is unchanged"""
+        rendered = self._render()
+        if rendered == self._last_written:
+            self._coordinator.stats["suppressed_state_writes"] += 1
+            return
+        self._last_written = rendered
+        self._coordinator.stats["state_writes"] += 1
+        self.async_write_ha_state()
+
+
+class StravaSummaryStatsSensor(StravaBaseSensor):
     _data = None  # Strava activity data
     _activity_type = None
 
-    def __init__(self, activity_type, metric, summary_type):
+    def __init__(
+        self, coordinator: StravaDataCoordinator, activity_type, metric, summary_type
+    ):
+        self._coordinator = coordinator
         self._metric = metric
         self._activity_type = activity_type
         self._summary_type = summary_type
@@ -129,50 +306,56 @@ class StravaSummaryStatsSensor(Entity):
             return "mdi:run"
         return CONF_SENSORS[self._metric]["icon"]
 
-    @property
-    def state(self):
-        if not self._data:
-            return -1
-
+    def _render_state(self):
+        """numeric state, unit and formatted state of the summary stats"""
         if self._metric == CONF_SENSOR_MOVING_TIME:
-            days = int(self._data[CONF_SENSOR_MOVING_TIME] // (3600 * 24))
-            hours = int(
-                (self._data[CONF_SENSOR_MOVING_TIME] - days * (3600 * 24)) // 3600
-            )
-            minutes = int(
-                (
-                    self._data[CONF_SENSOR_MOVING_TIME]
-                    - days * (3600 * 24)
-                    - hours * 3600
-                )
-                // 60
-            )
-            seconds = int(
-                self._data[CONF_SENSOR_MOVING_TIME]
-                - days * (3600 * 24)
-                - hours * 3600
-                - minutes * 60
-            )
-            return "".join(
-                [
-                    "" if days == 0 else f"{days} Day(s), ",
-                    "" if hours == 0 and days == 0 else f"{hours:02}:",
-                    "" if minutes == 0 and hours == 0 else f"{minutes:02}:",
-                    f"{seconds:02}",
-                ]
+            moving_time = self._data[CONF_SENSOR_MOVING_TIME]
+            return (
+                round(moving_time / 3600, 2),
+                TIME_HOURS,
+                format_duration(moving_time),
             )
 
         if self._metric == CONF_SENSOR_DISTANCE:
-            distance = (
-                f"{round(self._data[CONF_SENSOR_DISTANCE]/1000,2)} {LENGTH_KILOMETERS}"
-            )
+            distance = round(self._data[CONF_SENSOR_DISTANCE] / 1000, 2)
+            unit = LENGTH_KILOMETERS
+
+            if not self.hass.config.units.is_metric:
+                distance = round(
+                    self._data[CONF_SENSOR_DISTANCE] * FACTOR_METER_TO_MILE, 2
+                )
+                unit = LENGTH_MILES
+
+            return distance, unit, f"{distance} {unit}"
+
+        count = int(self._data[CONF_SENSOR_ACTIVITY_COUNT])
+        return count, None, str(count)
 
+    @property
+    def native_value(self):
+        if not self._data:
+            return None
+        return self._render_state()[0]
+
+    @property
+    def native_unit_of_measurement(self):
+        if self._metric == CONF_SENSOR_MOVING_TIME:
+            return TIME_HOURS
+        if self._metric == CONF_SENSOR_DISTANCE:
             if not self.hass.config.units.is_metric:
-                distance = f"{round(self._data[CONF_SENSOR_DISTANCE]*FACTOR_METER_TO_MILE,2)} {LENGTH_MILES}"
+                return LENGTH_MILES
+            return LENGTH_KILOMETERS
+        return None
 
-            return distance
+    @property
+    def state_class(self):
+        return STATE_CLASS_TOTAL_INCREASING
 
-        return int(self._data[CONF_SENSOR_ACTIVITY_COUNT])
+    @property
+    def extra_state_attributes(self):
+        if not self._data:
+            return {}
+        return {"formatted": self._render_state()[2]}
 
     @property
     def name(self):
@@ -196,31 +379,134 @@ class StravaSummaryStatsSensor(Entity):
     def should_poll(self):
         return False
 
-    def strava_data_update_event_handler(self, event):
-        """Handle Strava API data which is emmitted from a Strava Update Event"""
-        summary_stats = event.data.get("summary_stats", None)
-        if not summary_stats:
+    @callback
+    def strava_data_update_handler(self):
+        """Handle Strava API data which is pushed by the coordinator"""
+        summary = self._coordinator.summary(self._activity_type, self._summary_type)
+        if not summary:
             return
-        self._data = summary_stats[self._activity_type][self._summary_type]
-        self.async_write_ha_state()
+        self._data = summary
+        self.async_write_ha_state_if_changed()
 
     async def async_added_to_hass(self):
-        self.hass.bus.async_listen(
-            CONF_STRAVA_DATA_UPDATE_EVENT, self.strava_data_update_event_handler
+        self._data = self._coordinator.summary(self._activity_type, self._summary_type)
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass,
+                summary_signal(self._activity_type, self._summary_type),
+                self.strava_data_update_handler,
+            )
         )
 
-    async def async_will_remove_from_hass(self):
-        self.hass.bus._async_remove_listener(
-            event_type=CONF_STRAVA_DATA_UPDATE_EVENT,
-            listener=self.strava_data_update_event_handler,
+
+class StravaAggregateSensor(StravaSummaryStatsSensor):
+    """
+    Totals of an activity type over a recent time window (e.g. this week), computed from the local activity history
+    """
+
+    def __init__(
+        self, coordinator: StravaDataCoordinator, activity_type, metric, window
+    ):
+        self._coordinator = coordinator
+        self._metric = metric
+        self._activity_type = activity_type
+        self._window = window
+        self.entity_id = f"{DOMAIN}.strava_aggregate_{self._window}_{self._activity_type}_{self._metric}"
+
+    @property
+    def device_info(self):
+        return {
+            "identifiers": {
+                (DOMAIN, f"strava_aggregate_{self._window}_{self._activity_type}")
+            },
+            "name": f"Strava {AGGREGATE_WINDOWS[self._window]} {self._activity_type}",
+            "manufacturer": "Strava",
+            "model": "Activity",
+        }
+
+    @property
+    def unique_id(self):
+        return f"strava_aggregate_{self._window}_{self._activity_type}_{self._metric}"
+
+    def _render_state(self):
+        """numeric state, unit and formatted state of the totals"""
+        if self._metric == CONF_SENSOR_ELEVATION:
+            elevation = round(self._data[CONF_SENSOR_ELEVATION])
+            unit = LENGTH_METERS
+
+            if not self.hass.config.units.is_metric:
+                elevation = round(
+                    self._data[CONF_SENSOR_ELEVATION] * FACTOR_METER_TO_FEET
+                )
+                unit = LENGTH_FEET
+
+            return elevation, unit, f"{elevation} {unit}"
+
+        if self._metric == CONF_SENSOR_CALORIES:
+            calories = round(self._data[CONF_SENSOR_CALORIES])
+            return calories, UNIT_KILOCALORIES, f"{calories} {UNIT_KILOCALORIES}"
+
+        return super()._render_state()
+
+    @property
+    def native_unit_of_measurement(self):
+        if self._metric == CONF_SENSOR_ELEVATION:
+            if not self.hass.config.units.is_metric:
+                return LENGTH_FEET
+            return LENGTH_METERS
+        if self._metric == CONF_SENSOR_CALORIES:
+            return UNIT_KILOCALORIES
+        return super().native_unit_of_measurement
+
+    @property
+    def state_class(self):
+        # rolling windows shrink as activities drop out of them
+        if self._window in [
+            AGGREGATE_WINDOW_LAST_7_DAYS,
+            AGGREGATE_WINDOW_ROLLING_28_DAYS,
+        ]:
+            return STATE_CLASS_MEASUREMENT
+        return STATE_CLASS_TOTAL_INCREASING
+
+    @property
+    def name(self):
+        return (
+            f"{AGGREGATE_WINDOWS[self._window]} "
+            + str.upper(self._activity_type[0])
+            + self._activity_type[1:]
+            + " "
+            + str.join(
+                " ", ["" + str.upper(s[0]) + s[1:] for s in self._metric.split("_")]
+            )
+        )
+
+    @callback
+    def strava_data_update_handler(self):
+        """Handle aggregates which are pushed by the coordinator"""
+        totals = self._coordinator.aggregate(self._activity_type, self._window)
+        if totals is None:
+            return
+        self._data = totals
+        self.async_write_ha_state_if_changed()
+
+    async def async_added_to_hass(self):
+        self._data = self._coordinator.aggregate(self._activity_type, self._window)
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass,
+                aggregate_signal(self._activity_type, self._window),
+                self.strava_data_update_handler,
+            )
         )
 
 
-class StravaStatsSensor(Entity):
+class StravaStatsSensor(StravaBaseSensor):
     _data = None  # Strava activity data
     _activity_index = None
+    _view = None  # rendered state, name, icon, unit and attributes
 
-    def __init__(self, activity_index, sensor_index):
+    def __init__(self, coordinator: StravaDataCoordinator, activity_index, sensor_index):
+        self._coordinator = coordinator
         self._sensor_index = sensor_index
         self._activity_index = int(activity_index)
         self.entity_id = f"{DOMAIN}.strava_{self._activity_index}_{self._sensor_index}"
@@ -234,10 +520,6 @@ class StravaStatsSensor(Entity):
             "model": "Activity",
         }
 
-    @property
-    def entity_registry_enabled_default(self) -> bool:
-        return self._activity_index < DEFAULT_NB_ACTIVITIES
-
     @property
     def available(self):
         return True
@@ -246,25 +528,67 @@ class StravaStatsSensor(Entity):
     def unique_id(self):
         return f"strava_{self._activity_index}_{self._sensor_index}"
 
-    @property
-    def icon(self):
-        if not self._data:
-            return "mdi:run"
-
+    def _sensor_options(self):
+        """sensor options for the type of the current activity; None if the config entry is missing"""
         ha_strava_config_entries = self.hass.config_entries.async_entries(domain=DOMAIN)
 
         if len(ha_strava_config_entries) != 1:
-            return "mdi:run"
+            return None
 
-        _LOGGER.debug(
-            f"Activity Index: {self._activity_index} | Activity Type: {self._data[CONF_SENSOR_ACTIVITY_TYPE]}"
-        )
-        sensor_options = ha_strava_config_entries[0].options.get(
+        return ha_strava_config_entries[0].options.get(
             self._data[CONF_SENSOR_ACTIVITY_TYPE], CONF_SENSOR_DEFAULT
         )
 
-        _LOGGER.debug(f"Sensor Config: {sensor_options}")
+    def _render_view(self):
+        """
+        precompute state, name, icon, unit and attributes for the current data, sensor options and unit system
+        the view is invalidated by the coordinator whenever one of them changes
+        """
+        view = {
+            "state": None,
+            "name": self._render_name(None),
+            "icon": "mdi:run",
+            "unit": None,
+            "device_class": None,
+            "state_class": None,
+            "attributes": {},
+        }
+
+        if not self._data:
+            return view
+
+        sensor_options = self._sensor_options()
+
+        if sensor_options is None:
+            return {**view, "name": -1}
+
+        _LOGGER.debug(
+            f"Activity Index: {self._activity_index} | Activity Type: {self._data[CONF_SENSOR_ACTIVITY_TYPE]} | Sensor Config: {sensor_options}"
+        )
+
+        rendered_state = self._render_state(sensor_options)
 
+        return {
+            **view,
+            "state": rendered_state["state"],
+            "name": self._render_name(sensor_options),
+            "icon": self._render_icon(sensor_options),
+            "unit": rendered_state.get("unit"),
+            "device_class": rendered_state.get("device_class"),
+            "state_class": rendered_state.get("state_class", STATE_CLASS_MEASUREMENT),
+            "attributes": {
+                "formatted": rendered_state.get(
+                    "formatted", str(rendered_state["state"])
+                )
+            },
+        }
+
+    def _view_value(self, key):
+        if self._view is None:
+            self._view = self._render_view()
+        return self._view[key]
+
+    def _render_icon(self, sensor_options):
         if self._sensor_index == 0:
             return sensor_options["icon"]
 
@@ -272,101 +596,126 @@ class StravaStatsSensor(Entity):
         return CONF_SENSORS[metric]["icon"]
 
     @property
-    def state(self):
-        if not self._data:
-            return -1
+    def icon(self):
+        return self._view_value("icon")
 
-        ha_strava_config_entries = self.hass.config_entries.async_entries(domain=DOMAIN)
+    @property
+    def native_value(self):
+        return self._view_value("state")
 
-        if len(ha_strava_config_entries) != 1:
-            return -1
+    @property
+    def native_unit_of_measurement(self):
+        return self._view_value("unit")
 
-        sensor_metrics = list(
-            ha_strava_config_entries[0]
-            .options.get(self._data[CONF_SENSOR_ACTIVITY_TYPE], CONF_SENSOR_DEFAULT)
-            .values()
-        )
+    @property
+    def device_class(self):
+        return self._view_value("device_class")
+
+    @property
+    def state_class(self):
+        return self._view_value("state_class")
 
-        metric = sensor_metrics[self._sensor_index]
+    @property
+    def extra_state_attributes(self):
+        return self._view_value("attributes")
+
+    def _render_state(self, sensor_options):
+        """
+        numeric state of the sensor together with its unit, device class and state class
+        the human-readable state is rendered as `formatted`
+        """
+        metric = list(sensor_options.values())[self._sensor_index]
 
         if self._sensor_index == 0:
-            return f"{self._data[CONF_SENSOR_TITLE]} | {self._data[CONF_SENSOR_CITY]}"
+            return {
+                "state": f"{self._data[CONF_SENSOR_TITLE]} | {self._data[CONF_SENSOR_CITY]}",
+                "state_class": None,
+            }
+
+        is_metric = self.hass.config.units.is_metric
+        moving_time = self._data[CONF_SENSOR_MOVING_TIME]
+        distance = self._data[CONF_SENSOR_DISTANCE] / 1000
+        distance_unit = LENGTH_KILOMETERS
+        if not is_metric:
+            distance = self._data[CONF_SENSOR_DISTANCE] * FACTOR_METER_TO_MILE
+            distance_unit = LENGTH_MILES
 
         if metric == CONF_SENSOR_DURATION:
-            days = int(self._data[CONF_SENSOR_MOVING_TIME] // (3600 * 24))
-            hours = int(
-                (self._data[CONF_SENSOR_MOVING_TIME] - days * (3600 * 24)) // 3600
-            )
-            minutes = int(
-                (
-                    self._data[CONF_SENSOR_MOVING_TIME]
-                    - days * (3600 * 24)
-                    - hours * 3600
-                )
-                // 60
-            )
-            seconds = int(
-                self._data[CONF_SENSOR_MOVING_TIME]
-                - days * (3600 * 24)
-                - hours * 3600
-                - minutes * 60
-            )
-            return "".join(
-                [
-                    "" if days == 0 else f"{days} Day(s), ",
-                    "" if hours == 0 and days == 0 else f"{hours:02}:",
-                    "" if minutes == 0 and hours == 0 else f"{minutes:02}:",
-                    f"{seconds:02}",
-                ]
-            )
+            return {
+                "state": round(moving_time / 60, 2),
+                "unit": TIME_MINUTES,
+                "formatted": format_duration(moving_time),
+            }
 
         if metric == CONF_SENSOR_DISTANCE:
-            distance = (
-                f"{round(self._data[CONF_SENSOR_DISTANCE]/1000,2)} {LENGTH_KILOMETERS}"
-            )
-
-            if not self.hass.config.units.is_metric:
-                distance = f"{round(self._data[CONF_SENSOR_DISTANCE]*FACTOR_METER_TO_MILE,2)} {LENGTH_MILES}"
-
-            return distance
+            return {
+                "state": round(distance, 2),
+                "unit": distance_unit,
+                "formatted": f"{round(distance, 2)} {distance_unit}",
+            }
 
         if metric == CONF_SENSOR_PACE:
-            pace = self._data[CONF_SENSOR_MOVING_TIME] / (
-                self._data[CONF_SENSOR_DISTANCE] / 1000
-            )
-            unit = f"{TIME_MINUTES}/{LENGTH_KILOMETERS}"
-            if not self.hass.config.units.is_metric:
-                pace = (self._data[CONF_SENSOR_MOVING_TIME]) / (
-                    self._data[CONF_SENSOR_DISTANCE] * FACTOR_METER_TO_MILE
-                )
-                unit = f"{TIME_MINUTES}/{LENGTH_MILES}"
+            unit = f"{TIME_MINUTES}/{distance_unit}"
+            if distance <= 0:
+                return {"state": None, "unit": unit}
 
+            pace = moving_time / distance
             minutes = int(pace // 60)
             seconds = int(pace - minutes * 60)
-            return "".join(
-                ["" if minutes == 0 else f"{minutes:02}:", f"{seconds:02}", " ", unit]
-            )
+            return {
+                "state": round(pace / 60, 2),
+                "unit": unit,
+                "formatted": "".join(
+                    [
+                        "" if minutes == 0 else f"{minutes:02}:",
+                        f"{seconds:02}",
+                        " ",
+                        unit,
+                    ]
+                ),
+            }
 
         if metric == CONF_SENSOR_SPEED:
-            speed = f"{round((self._data[CONF_SENSOR_DISTANCE]/1000)/(self._data[CONF_SENSOR_MOVING_TIME]/3600),2)} {SPEED_KILOMETERS_PER_HOUR}"
+            unit = SPEED_KILOMETERS_PER_HOUR if is_metric else SPEED_MILES_PER_HOUR
+            if moving_time <= 0:
+                return {"state": None, "unit": unit}
 
-            if not self.hass.config.units.is_metric:
-                speed = f"{round((self._data[CONF_SENSOR_DISTANCE]*FACTOR_METER_TO_MILE)/(self._data[CONF_SENSOR_MOVING_TIME]/3600),2)} {SPEED_MILES_PER_HOUR}"
-            return speed
+            speed = round(distance / (moving_time / 3600), 2)
+            return {"state": speed, "unit": unit, "formatted": f"{speed} {unit}"}
 
         if metric == CONF_SENSOR_POWER:
-            return f"{int(round(self._data[CONF_SENSOR_POWER],1))} W"
+            power = int(round(self._data[CONF_SENSOR_POWER], 0))
+            return {
+                "state": power,
+                "unit": POWER_WATT,
+                "device_class": DEVICE_CLASS_POWER,
+                "formatted": f"{power} {POWER_WATT}",
+            }
 
         if metric == CONF_SENSOR_ELEVATION:
-            elevation = f"{round(self._data[CONF_SENSOR_ELEVATION],0)} {LENGTH_METERS}"
-            if not self.hass.config.units.is_metric:
-                elevation = f"{round(self._data[CONF_SENSOR_ELEVATION]*FACTOR_METER_TO_FEET,0)} {LENGTH_FEET}"
-            return elevation
+            elevation = round(self._data[CONF_SENSOR_ELEVATION], 0)
+            unit = LENGTH_METERS
+            if not is_metric:
+                elevation = round(
+                    self._data[CONF_SENSOR_ELEVATION] * FACTOR_METER_TO_FEET, 0
+                )
+                unit = LENGTH_FEET
+            return {
+                "state": int(elevation),
+                "unit": unit,
+                "formatted": f"{int(elevation)} {unit}",
+            }
 
-        return str(self._data[metric])
+        if metric == CONF_SENSOR_CALORIES:
+            return {"state": int(self._data[metric]), "unit": UNIT_KILOCALORIES}
+
+        return {"state": int(self._data[metric])}
 
     @property
     def name(self):
+        return self._view_value("name")
+
+    def _render_name(self, sensor_options):
         if self._sensor_index == 0:
             return (
                 "Title & Date"
@@ -377,40 +726,102 @@ class StravaStatsSensor(Entity):
         if not self._data:
             metric = list(CONF_SENSOR_DEFAULT.values())[self._sensor_index]
         else:
-            ha_strava_config_entries = self.hass.config_entries.async_entries(
-                domain=DOMAIN
-            )
+            metric = list(sensor_options.values())[self._sensor_index]
 
-            if len(ha_strava_config_entries) != 1:
-                return -1
+        return "" + str.upper(metric[0]) + metric[1:]
 
-            sensor_metrics = list(
-                ha_strava_config_entries[0]
-                .options.get(self._data[CONF_SENSOR_ACTIVITY_TYPE], CONF_SENSOR_DEFAULT)
-                .values()
+    @property
+    def should_poll(self):
+        return False
+
+    @callback
+    def strava_data_update_handler(self):
+        """
+        Handle Strava API data which is pushed by the coordinator
+        Also called after the sensor options or the unit system changed
+        """
+        self._data = self._coordinator.activity(self._activity_index)
+        self._view = None
+        self.async_write_ha_state_if_changed()
+
+    async def async_added_to_hass(self):
+        self._data = self._coordinator.activity(self._activity_index)
+        self._view = None
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass,
+                activity_signal(self._activity_index),
+                self.strava_data_update_handler,
             )
+        )
 
-            metric = sensor_metrics[self._sensor_index]
 
-        return "" + str.upper(metric[0]) + metric[1:]
+class StravaActivityHistorySensor(StravaBaseSensor):
+    """
+    Exposes the activity window (up to MAX_ACTIVITY_WINDOW activities) for templates
+    The state is the number of activities; the activities are listed in the `activities` attribute,
+    which is excluded from the recorder as of HA 2023.9
+    """
+
+    _unrecorded_attributes = frozenset({"activities"})
+
+    def __init__(self, coordinator: StravaDataCoordinator):
+        self._coordinator = coordinator
+        self.entity_id = f"{DOMAIN}.{CONF_HISTORY_ENTITY}"
+
+    @property
+    def available(self):
+        return True
+
+    @property
+    def unique_id(self):
+        return CONF_HISTORY_ENTITY
+
+    @property
+    def name(self):
+        return "Strava Activity History"
+
+    @property
+    def icon(self):
+        return "mdi:history"
+
+    @property
+    def native_value(self):
+        return len(self._coordinator.activities)
+
+    @property
+    def native_unit_of_measurement(self):
+        return "activities"
+
+    @property
+    def extra_state_attributes(self):
+        return {
+            "activities": [
+                {
+                    CONF_SENSOR_ID: activity[CONF_SENSOR_ID],
+                    CONF_SENSOR_DATE: activity[CONF_SENSOR_DATE].isoformat(),
+                    CONF_SENSOR_TITLE: activity[CONF_SENSOR_TITLE],
+                    CONF_SENSOR_ACTIVITY_TYPE: activity[CONF_SENSOR_ACTIVITY_TYPE],
+                    CONF_SENSOR_CITY: activity[CONF_SENSOR_CITY],
+                    CONF_SENSOR_DISTANCE: activity[CONF_SENSOR_DISTANCE],
+                    CONF_SENSOR_MOVING_TIME: activity[CONF_SENSOR_MOVING_TIME],
+                }
+                for activity in self._coordinator.activities
+            ]
+        }
 
     @property
     def should_poll(self):
         return False
 
-    def strava_data_update_event_handler(self, event):
-        """Handle Strava API data which is emmitted from a Strava Update Event"""
-        self._data = event.data["activities"][self._activity_index]
-        self.async_write_ha_state()
+    @callback
+    def strava_data_update_handler(self):
+        """Handle Strava API data which is pushed by the coordinator"""
+        self.async_write_ha_state_if_changed()
 
     async def async_added_to_hass(self):
-        self.hass.bus.async_listen(
-            CONF_STRAVA_DATA_UPDATE_EVENT, self.strava_data_update_event_handler
-        )
-
-    async def async_will_remove_from_hass(self):
-        self.hass.bus._async_remove_listener(
-            event_type=CONF_STRAVA_DATA_UPDATE_EVENT,
-            listener=self.strava_data_update_event_handler,
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass, SIGNAL_HISTORY_UPDATE, self.strava_data_update_handler,
+            )
         )
-
@@ -0,0 +1,66 @@
+"""Persistent snapshot of the data which has been pushed to the sensors"""
+# generic imports
+import json
+import logging
+from hashlib import sha1
+from typing import Optional
+
+# HASS imports
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+# custom module imports
+from .const import (
+    STORAGE_VERSION,
+    STORAGE_KEY_SNAPSHOT,
+    STORAGE_SAVE_DELAY_SECONDS,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def data_version(activities: list, summary_stats: Optional[dict]) -> str:
+    """hash of the activities and summary stats, used to detect unchanged data"""
+    return sha1(
+        json.dumps(
+            {"activities": activities, "summary_stats": summary_stats},
+            sort_keys=True,
+            default=str,
+        ).encode()
+    ).hexdigest()
+
+
+class DataSnapshot:
+    """
+    Version (hash) and summary stats of the data which has last been pushed to the sensors
+    Persisted in HA's .storage directory, so that the sensors can be restored right after a restart;
+    the activities themselves are restored from the local activity history
+    """
+
+    def __init__(self, hass: HomeAssistant):
+        self._store = Store(hass, STORAGE_VERSION, STORAGE_KEY_SNAPSHOT)
+        self.version = None
+        self.summary_stats = None
+
+    async def async_load(self):
+        data = await self._store.async_load()
+        if not data:
+            return
+        self.version = data.get("version")
+        self.summary_stats = data.get("summary_stats")
+        _LOGGER.debug(f"Loaded snapshot of the Strava data (version: {self.version})")
+
+    @callback
+    def update(self, activities: list, summary_stats: Optional[dict]) -> bool:
+        """store a new snapshot; returns False if the data did not change since the last snapshot"""
+        version = data_version(activities, summary_stats)
+        if version == self.version:
+            return False
+
+        self.version = version
+        self.summary_stats = summary_stats
+        self._store.async_delay_save(
+            lambda: {"version": self.version, "summary_stats": self.summary_stats},
+            STORAGE_SAVE_DELAY_SECONDS,
+        )
+        return True
@@ -0,0 +1,154 @@
+"""Validation, deduplication and queueing of incoming Strava webhook events"""
+# generic imports
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Optional
+
+# HASS imports
+from homeassistant.core import HomeAssistant, callback
+
+# custom module imports
+from .const import (
+    WEBHOOK_OBJECT_TYPE_ACTIVITY,
+    WEBHOOK_OBJECT_TYPE_ATHLETE,
+    WEBHOOK_ASPECT_TYPE_CREATE,
+    WEBHOOK_ASPECT_TYPE_UPDATE,
+    WEBHOOK_ASPECT_TYPE_DELETE,
+    WEBHOOK_QUEUE_MAX_SIZE,
+    WEBHOOK_DEDUP_TTL_SECONDS,
+    WEBHOOK_DEDUP_MAX_ENTRIES,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def parse_webhook_event(
+    data, subscription_id: Optional[int], owner_id: Optional[int]
+) -> Optional[dict]:
+    """
+    validates the payload of a webhook event and returns the normalized event
+    returns None if the event is malformed, or does not belong to our subscription or athlete
+    the owner is not checked as long as the athlete id is unknown
+    """
+    if not isinstance(data, dict):
+        return None
+
+    try:
+        event = {
+            "subscription_id": int(data["subscription_id"]),
+            "owner_id": int(data["owner_id"]),
+            "object_type": str(data["object_type"]),
+            "object_id": int(data["object_id"]),
+            "aspect_type": str(data["aspect_type"]),
+            "event_time": int(data.get("event_time", 0)),
+            "updates": data.get("updates") or {},
+        }
+    except (KeyError, TypeError, ValueError):
+        return None
+
+    if subscription_id is None or event["subscription_id"] != int(subscription_id):
+        return None
+    if owner_id is not None and event["owner_id"] != int(owner_id):
+        return None
+    if event["object_type"] not in [
+        WEBHOOK_OBJECT_TYPE_ACTIVITY,
+        WEBHOOK_OBJECT_TYPE_ATHLETE,
+    ]:
+        return None
+    if event["aspect_type"] not in [
+        WEBHOOK_ASPECT_TYPE_CREATE,
+        WEBHOOK_ASPECT_TYPE_UPDATE,
+        WEBHOOK_ASPECT_TYPE_DELETE,
+    ]:
+        return None
+    if not isinstance(event["updates"], dict):
+        return None
+
+    return event
+
+
+class WebhookEventQueue:
+    """
+    Bounded queue of webhook events which is drained by a single worker
+    Duplicate deliveries of the same event (object id, aspect type, event time) within `dedup_ttl_seconds` are dropped
+    Events are dropped as well if the queue is full, so that a flood of requests never spawns unbounded work
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        handle_event: Callable[[dict], Awaitable],
+        max_size: int = WEBHOOK_QUEUE_MAX_SIZE,
+        dedup_ttl_seconds: float = WEBHOOK_DEDUP_TTL_SECONDS,
+        dedup_max_entries: int = WEBHOOK_DEDUP_MAX_ENTRIES,
+    ):
+        self._hass = hass
+        self._handle_event = handle_event
+        self._queue = asyncio.Queue(maxsize=max_size)
+        self._dedup_ttl_seconds = dedup_ttl_seconds
+        self._dedup_max_entries = dedup_max_entries
+        self._seen = OrderedDict()  # (object id, aspect type, event time) -> expiry
+        self._worker = None
+        self.stats = {"accepted": 0, "duplicates": 0, "dropped": 0}
+
+    def _is_duplicate(self, key, now: float) -> bool:
+        # entries expire in insertion order, as all of them have the same ttl
+        while self._seen and next(iter(self._seen.values())) <= now:
+            self._seen.popitem(last=False)
+
+        if key in self._seen:
+            return True
+
+        self._seen[key] = now + self._dedup_ttl_seconds
+        while len(self._seen) > self._dedup_max_entries:
+            self._seen.popitem(last=False)
+        return False
+
+    @callback
+    def async_submit(self, event: dict) -> bool:
+        """queue a validated event without blocking; returns False if the event was dropped"""
+        key = (event["object_id"], event["aspect_type"], event["event_time"])
+        if self._is_duplicate(key, time.monotonic()):
+            self.stats["duplicates"] += 1
+            _LOGGER.debug(f"Dropping duplicate Strava webhook event {key}")
+            return False
+
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.stats["dropped"] += 1
+            # allow a redelivery of the event to be queued
+            self._seen.pop(key, None)
+            _LOGGER.warning(
+                f"Strava webhook queue is full: dropping event {key} | stats: {self.stats}"
+            )
+            return False
+
+        self.stats["accepted"] += 1
+        return True
+
+    async def _run(self):
+        while True:
+            event = await self._queue.get()
+            try:
+                await self._handle_event(event)
+            except asyncio.CancelledError:
+                raise
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception(f"Unexpected error while handling Strava webhook event {event}")
+            finally:
+                self._queue.task_done()
+
+    @callback
+    def async_start(self):
+        """start the worker which drains the queue"""
+        if self._worker is None:
+            self._worker = self._hass.async_create_task(self._run())
+
+    @callback
+    def async_stop(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None